@@ -38,13 +38,64 @@
 ######################################################################
 
 import os
+import sys
+import io
 import re
 import logging
 import gzip
+import functools
+import operator
+import threading
+
+try:
+    import cPickle as pickle
+except ImportError: # Python 3
+    import pickle
 
 import xml.parsers.expat
 from xml.sax.handler import ContentHandler
 
+try:
+    import lxml.etree as _lxml_etree
+except ImportError:
+    _lxml_etree = None
+if str is bytes:
+    # Python 2: lxml returns str for ASCII text and unicode otherwise,
+    # the names read with expat are always unicode.
+    _lxml_etree = None
+
+try:
+    from functools import lru_cache as _lru_cache
+except ImportError: # Python 2
+    def _lru_cache(maxsize=128):
+        '''
+        Only for internal use. Simple replacement for
+        functools.lru_cache() which is missing in Python 2. Instead of
+        discarding the least recently used entry, the whole cache is
+        cleared when it is full.
+        '''
+        def decorating_function(function):
+            cache = {}
+            def wrapper(*args, **kwargs):
+                key = (args, tuple(sorted(kwargs.items())))
+                try:
+                    return cache[key]
+                except KeyError:
+                    pass
+                result = function(*args, **kwargs)
+                if maxsize is not None and len(cache) >= maxsize:
+                    cache.clear()
+                cache[key] = result
+                return result
+            wrapper.cache_clear = cache.clear
+            return functools.update_wrapper(wrapper, function)
+        return decorating_function
+
+try:
+    _intern = sys.intern
+except AttributeError: # Python 2
+    _intern = intern
+
 # will be replaced by “make install”:
 _datadir = '/usr/share/langtable'
 
@@ -71,6 +122,12 @@ _cldr_locale_pattern = re.compile(
     +'(?=$|@' # locale string ends here or only options follow
     +')){0,1}')
 
+# Matches translated names of the form “language name (territory name)”,
+# used by languageId():
+_language_territory_pattern = re.compile(
+    r'^(?P<language_name>[^()]+)[\s]+[(](?P<territory_name>[^()]+)[)]',
+    re.MULTILINE|re.UNICODE)
+
 # http://www.unicode.org/iso15924/iso15924-codes.html
 _glibc_script_ids = {
     'latin': 'Latn',
@@ -79,13 +136,30 @@ _glibc_script_ids = {
     'devanagari': 'Deva',
 }
 
+# Matches all the glibc script names in one pass (longest names first
+# in case one name is a prefix of another):
+_glibc_script_pattern = re.compile(
+    '|'.join([re.escape(key)
+              for key in sorted(_glibc_script_ids, key=len, reverse=True)]))
+
+def _replace_glibc_script_id(match):
+    '''
+    Only for internal use. Replacement function for _glibc_script_pattern.
+    '''
+    return _glibc_script_ids[match.group(0)]
+
 _territories_db = {}
 _languages_db = {}
 _keyboards_db = {}
+# The timezone databases map the ids directly to the dictionaries of
+# translated names, there is nothing else stored for a timezone:
 _timezones_db = {}
 _timezoneIdParts_db = {}
 
-class territory_db_item:
+class territory_db_item(object):
+    __slots__ = ('names', 'scripts', 'locales', 'languages', 'keyboards',
+                 'inputmethods', 'consolefonts', 'timezones')
+
     def __init__(self, names = None, scripts=None, locales=None, languages=None, keyboards=None, inputmethods=None, consolefonts=None, timezones=None):
         self.names = names
         self.scripts = scripts
@@ -96,7 +170,11 @@ class territory_db_item:
         self.consolefonts = consolefonts
         self.timezones = timezones
 
-class language_db_item:
+class language_db_item(object):
+    __slots__ = ('iso639_1', 'iso639_2_t', 'iso639_2_b', 'names', 'scripts',
+                 'locales', 'territories', 'keyboards', 'inputmethods',
+                 'consolefonts', 'timezones')
+
     def __init__(self, iso639_1=None, iso639_2_t=None, iso639_2_b=None, names=None, scripts=None, locales=None, territories=None, keyboards=None, inputmethods=None, consolefonts=None, timezones=None):
         self.iso639_1 = iso639_1
         self.iso639_2_t = iso639_2_t
@@ -110,7 +188,9 @@ class language_db_item:
         self.consolefonts = consolefonts
         self.timezones = timezones
 
-class keyboard_db_item:
+class keyboard_db_item(object):
+    __slots__ = ('description', 'ascii', 'comment', 'languages', 'territories')
+
     def __init__(self, description=None, ascii=True, languages=None, territories = None, comment=None):
         self.description = description
         self.ascii  = ascii
@@ -118,13 +198,136 @@ class keyboard_db_item:
         self.languages = languages
         self.territories = territories
 
-class timezone_db_item:
-    def __init__(self, names=None):
-        self.names = names
+def _lxml_names(element):
+    '''
+    Only for internal use. Returns the dictionary of translated names
+    in a <names> element parsed by lxml.
+    '''
+    names = {}
+    for name in element:
+        languageId = None
+        trName = None
+        for child in name:
+            if child.tag == 'languageId':
+                languageId = child.text
+            elif child.tag == 'trName':
+                trName = child.text
+        names[_intern(languageId)] = trName
+    return names
+
+def _lxml_ranks(element):
+    '''
+    Only for internal use. Returns the dictionary of ranks in an element
+    like <locales> parsed by lxml. The id of an item is in the child
+    named like the item with “Id” appended:
 
-class timezoneIdPart_db_item:
-    def __init__(self, names=None):
-        self.names = names
+        <locale><localeId>de_DE.UTF-8</localeId><rank>100</rank></locale>
+    '''
+    ranks = {}
+    for item in element:
+        id_tag = item.tag + 'Id'
+        itemId = None
+        rank = None
+        for child in item:
+            if child.tag == id_tag:
+                itemId = child.text
+            elif child.tag == 'rank':
+                rank = child.text
+        ranks[_intern(itemId)] = int(rank)
+    return ranks
+
+def _lxml_territory(element):
+    '''
+    Only for internal use. Returns the id and the territory_db_item
+    of a <territory> element parsed by lxml.
+    '''
+    territoryId = None
+    fields = dict([(field, {}) for field in territory_db_item.__slots__])
+    for child in element:
+        if child.tag == 'territoryId':
+            territoryId = _intern(child.text)
+        elif child.tag == 'names':
+            fields['names'] = _lxml_names(child)
+        elif child.tag in fields:
+            fields[child.tag] = _lxml_ranks(child)
+    return territoryId, territory_db_item(**fields)
+
+def _lxml_language(element):
+    '''
+    Only for internal use. Returns the id and the language_db_item
+    of a <language> element parsed by lxml.
+    '''
+    languageId = None
+    fields = dict([(field, {}) for field in language_db_item.__slots__])
+    fields.update(iso639_1=None, iso639_2_t=None, iso639_2_b=None)
+    for child in element:
+        if child.tag == 'languageId':
+            languageId = _intern(child.text)
+        elif child.tag == 'names':
+            fields['names'] = _lxml_names(child)
+        elif child.tag in ('iso639-1', 'iso639-2-t', 'iso639-2-b'):
+            fields[child.tag.replace('-', '_')] = child.text
+        elif child.tag in fields:
+            fields[child.tag] = _lxml_ranks(child)
+    return languageId, language_db_item(**fields)
+
+def _lxml_keyboard(element):
+    '''
+    Only for internal use. Returns the id and the keyboard_db_item
+    of a <keyboard> element parsed by lxml.
+    '''
+    keyboardId = None
+    fields = {'description': None, 'ascii': False, 'comment': None,
+              'languages': {}, 'territories': {}}
+    for child in element:
+        if child.tag == 'keyboardId':
+            keyboardId = _intern(child.text)
+        elif child.tag == 'ascii':
+            fields['ascii'] = child.text == 'True'
+        elif child.tag in ('description', 'comment'):
+            fields[child.tag] = child.text
+        elif child.tag in ('languages', 'territories'):
+            fields[child.tag] = _lxml_ranks(child)
+    return keyboardId, keyboard_db_item(**fields)
+
+def _lxml_names_record(id_tag):
+    '''
+    Only for internal use. Returns a function which returns the id and
+    the dictionary of translated names of a record element parsed by
+    lxml which has the id in the child id_tag.
+    '''
+    def read_record(element):
+        recordId = None
+        names = {}
+        for child in element:
+            if child.tag == id_tag:
+                recordId = _intern(child.text)
+            elif child.tag == 'names':
+                names = _lxml_names(child)
+        return recordId, names
+    return read_record
+
+# The functions reading the records of the data files with lxml, by the
+# name of the record element. They read the children of an element
+# once, in any order, and return the id and the item of the record.
+_lxml_readers = {
+    'territory': _lxml_territory,
+    'language': _lxml_language,
+    'keyboard': _lxml_keyboard,
+    'timezone': _lxml_names_record('timezoneId'),
+    'timezoneIdPart': _lxml_names_record('timezoneIdPartId'),
+}
+
+def _end_ranked_item(items):
+    '''
+    Only for internal use. Returns an end element handler which appends
+    the current item and its rank to the list attribute of the content
+    handler with the given name.
+    '''
+    def end_handler(self):
+        getattr(self, items).append((self._item_id, int(self._item_rank)))
+        self._clear_item()
+    return end_handler
 
 # xml.sax.handler.ContentHandler is not inherited from the 'object' class,
 # 'super' keyword wouldn't work, we need to inherit it on our own
@@ -134,13 +337,60 @@ class LangtableContentHandler(ContentHandler, object):
     providing handling for SAX events produced when parsing the langtable data
     files.
 
+    Instead of comparing the element name with all the names known in
+    a long if/elif chain, the handlers are looked up in dictionaries
+    which the subclasses fill:
+
+    _text_elements maps the names of elements containing text to the
+    name of the attribute where the text should be saved to.
+
+    _start_handlers and _end_handlers map element names to functions
+    called with (self, attrs) at the start and with (self) at the end
+    of the element.
+
+    The items read are stored in the database db given when creating
+    the handler.
+
     """
 
-    def __init__(self):
+    _text_elements = {}
+    _start_handlers = {}
+    _end_handlers = {}
+
+    # attributes containing translated text and not ids, they are not
+    # interned and on Python 2 they are kept as unicode
+    _unicode_attributes = frozenset(['_item_name', '_description', '_comment'])
+
+    def __init__(self, db):
+        # database where the items read are stored
+        self._db = db
+
         # internal attribute used to set where the upcoming text data should be
         # stored
         self._save_to = None
 
+        # text data collected for the current element, text content may
+        # split in multiple events
+        self._chunks = []
+
+    def startElement(self, name, attrs):
+        save_to = self._text_elements.get(name)
+        if save_to is not None:
+            self._save_to = save_to
+            return
+        start_handler = self._start_handlers.get(name)
+        if start_handler is not None:
+            start_handler(self, attrs)
+
+    def endElement(self, name):
+        # we don't allow text to appear on the same level as elements so outside
+        # of an element no text should appear
+        self._flush()
+
+        end_handler = self._end_handlers.get(name)
+        if end_handler is not None:
+            end_handler(self)
+
     def characters(self, content):
         """Handler for the text data event."""
 
@@ -148,20 +398,40 @@ class LangtableContentHandler(ContentHandler, object):
             # don't know where to save data
             return
 
-        # text content may split in multiple events
-        old_value = getattr(self, self._save_to)
-        if old_value:
-            new_value = old_value + content
-        else:
-            new_value = content
-
-        setattr(self, self._save_to, new_value)
+        self._chunks.append(content)
+
+    def _flush(self):
+        """
+        Stores the text data collected for the current element where it
+        should be saved to and stops collecting text data.
+
+        Joining the pieces once is linear in the length of the text,
+        concatenating them on every event would be quadratic.
+        """
+
+        if self._save_to is not None and self._chunks:
+            text = u''.join(self._chunks)
+            if str is bytes and self._save_to not in self._unicode_attributes:
+                # Python 2: expat returns unicode, but the ids have
+                # always been stored as str. Convert them once here
+                # instead of everywhere they are used.
+                text = str(text)
+            if (self._save_to not in self._unicode_attributes
+                and self._save_to != '_item_rank'):
+                # The same few hundred ids occur thousands of times,
+                # interned they are stored only once and dictionary
+                # lookups with them can compare by identity. The ranks
+                # are converted to int right away.
+                text = _intern(text)
+            setattr(self, self._save_to, text)
+        self._save_to = None
+        self._chunks = []
 
 class TerritoriesContentHandler(LangtableContentHandler):
     """Handler for SAX events produced when parsing the territories.xml file."""
 
-    def __init__(self):
-        super(TerritoriesContentHandler, self).__init__()
+    def __init__(self, db):
+        super(TerritoriesContentHandler, self).__init__(db)
 
         # simple values
         self._territoryId = None
@@ -171,7 +441,8 @@ class TerritoriesContentHandler(LangtableContentHandler):
         self._item_rank = None
         self._item_name = None
 
-        # dictionaries
+        # lists of (id, value) pairs, made into dictionaries when
+        # the item is complete
         self._names = None
         self._scripts = None
         self._locales = None
@@ -181,93 +452,84 @@ class TerritoriesContentHandler(LangtableContentHandler):
         self._consolefonts = None
         self._timezones = None
 
-    def startElement(self, name, attrs):
-        if name == u"territory":
-            self._names = dict()
-            self._scripts = dict()
-            self._locales = dict()
-            self._languages = dict()
-            self._keyboards = dict()
-            self._inputmethods = dict()
-            self._consolefonts = dict()
-            self._timezones = dict()
-
-        # non-dict values
-        elif name == u"territoryId":
-            self._save_to = "_territoryId"
-
-        # dict items
-        elif name in (u"languageId", u"scriptId", u"localeId", u"keyboardId", u"inputmethodId",
-                      u"consolefontId", u"timezoneId"):
-            self._save_to = "_item_id"
-        elif name == u"trName":
-            self._save_to = "_item_name"
-        elif name == u"rank":
-            self._save_to = "_item_rank"
-
-    def endElement(self, name):
-        # we don't allow text to appear on the same level as elements so outside
-        # of an element no text should appear
-        self._save_to = None
-
-        if name == u"territory":
-            _territories_db[str(self._territoryId)] = territory_db_item(
-                names = self._names,
-                scripts = self._scripts,
-                locales = self._locales,
-                languages = self._languages,
-                keyboards = self._keyboards,
-                inputmethods = self._inputmethods,
-                consolefonts = self._consolefonts,
-                timezones = self._timezones)
-
-            # clean after ourselves
-            self._territoryId = None
-            self._names = None
-            self._scripts = None
-            self._locales = None
-            self._languages = None
-            self._keyboards = None
-            self._inputmethods = None
-            self._consolefonts = None
-            self._timezones = None
+    def _start_territory(self, attrs):
+        self._names = []
+        self._scripts = []
+        self._locales = []
+        self._languages = []
+        self._keyboards = []
+        self._inputmethods = []
+        self._consolefonts = []
+        self._timezones = []
+
+    def _end_territory(self):
+        self._db[self._territoryId] = territory_db_item(
+            names = dict(self._names),
+            scripts = dict(self._scripts),
+            locales = dict(self._locales),
+            languages = dict(self._languages),
+            keyboards = dict(self._keyboards),
+            inputmethods = dict(self._inputmethods),
+            consolefonts = dict(self._consolefonts),
+            timezones = dict(self._timezones))
+
+        # clean after ourselves
+        self._territoryId = None
+        self._names = None
+        self._scripts = None
+        self._locales = None
+        self._languages = None
+        self._keyboards = None
+        self._inputmethods = None
+        self._consolefonts = None
+        self._timezones = None
 
-        # populating dictionaries
-        elif name == u"name":
-            self._names[str(self._item_id)] = self._item_name
-            self._clear_item()
-        elif name == u"script":
-            self._scripts[str(self._item_id)] = int(self._item_rank)
-            self._clear_item()
-        elif name == u"locale":
-            self._locales[str(self._item_id)] = int(self._item_rank)
-            self._clear_item()
-        elif name == u"language":
-            self._languages[str(self._item_id)] = int(self._item_rank)
-            self._clear_item()
-        elif name == u"keyboard":
-            self._keyboards[str(self._item_id)] = int(self._item_rank)
-            self._clear_item()
-        elif name == u"inputmethod":
-            self._inputmethods[str(self._item_id)] = int(self._item_rank)
-            self._clear_item()
-        elif name == u"consolefont":
-            self._consolefonts[str(self._item_id)] = int(self._item_rank)
-            self._clear_item()
-        elif name == u"timezone":
-            self._timezones[str(self._item_id)] = int(self._item_rank)
-            self._clear_item()
+    def _end_name(self):
+        self._names.append((self._item_id, self._item_name))
+        self._clear_item()
 
     def _clear_item(self):
         self._item_id = None
         self._item_name = None
         self._item_rank = None
 
+    _text_elements = {
+        # non-dict values
+        'territoryId': '_territoryId',
+        # dict items
+        'languageId': '_item_id',
+        'scriptId': '_item_id',
+        'localeId': '_item_id',
+        'keyboardId': '_item_id',
+        'inputmethodId': '_item_id',
+        'consolefontId': '_item_id',
+        'timezoneId': '_item_id',
+        'trName': '_item_name',
+        'rank': '_item_rank',
+    }
+
+    _start_handlers = {
+        'territory': _start_territory,
+    }
+
+    _end_handlers = {
+        'territory': _end_territory,
+        # populating dictionaries
+        'name': _end_name,
+        'script': _end_ranked_item('_scripts'),
+        'locale': _end_ranked_item('_locales'),
+        'language': _end_ranked_item('_languages'),
+        'keyboard': _end_ranked_item('_keyboards'),
+        'inputmethod': _end_ranked_item('_inputmethods'),
+        'consolefont': _end_ranked_item('_consolefonts'),
+        'timezone': _end_ranked_item('_timezones'),
+    }
+
 class KeyboardsContentHandler(LangtableContentHandler):
     """Handler for SAX events produced when parsing the keyboards.xml file."""
 
-    def __init__(self):
-        super(KeyboardsContentHandler, self).__init__()
+    def __init__(self, db):
+        super(KeyboardsContentHandler, self).__init__(db)
 
         # simple values
         self._keyboardId = None
@@ -279,69 +541,63 @@ class KeyboardsContentHandler(LangtableContentHandler):
         self._item_id = None
         self._item_rank = None
 
-        # dictionaries
+        # lists of (id, value) pairs, made into dictionaries when
+        # the item is complete
         self._languages = None
         self._territories = None
 
-    def startElement(self, name, attrs):
-        if name == u"keyboard":
-            self._languages = dict()
-            self._territories = dict()
-
-        # non-dict values
-        elif name == u"keyboardId":
-            self._save_to = "_keyboardId"
-        elif name == u"description":
-            self._save_to = "_description"
-        elif name == u"ascii":
-            self._save_to = "_ascii"
-        elif name == u"comment":
-            self._save_to = "_comment"
-
-        # dict items
-        elif name in (u"languageId", u"territoryId"):
-            self._save_to = "_item_id"
-        elif name == u"rank":
-            self._save_to = "_item_rank"
+    def _start_keyboard(self, attrs):
+        self._languages = []
+        self._territories = []
 
-    def endElement(self, name):
-        # we don't allow text to appear on the same level as elements so outside
-        # of an element no text should appear
-        self._save_to = None
+    def _end_keyboard(self):
+        self._db[self._keyboardId] = keyboard_db_item(
+            description = self._description,
+            ascii = self._ascii == 'True',
+            comment = self._comment,
+            languages = dict(self._languages),
+            territories = dict(self._territories))
 
-        if name == u"keyboard":
-            _keyboards_db[str(self._keyboardId)] = keyboard_db_item(
-                description = self._description,
-                ascii = self._ascii == u"True",
-                comment = self._comment,
-                languages = self._languages,
-                territories = self._territories)
-
-            # clean after ourselves
-            self._keyboardId = None
-            self._description = None
-            self._ascii = None
-            self._comment = None
-            self._languages = None
-            self._territories = None
-
-        # populating dictionaries
-        elif name == u"language":
-            self._languages[str(self._item_id)] = int(self._item_rank)
-            self._clear_item()
-        elif name == u"territory":
-            self._territories[str(self._item_id)] = int(self._item_rank)
-            self._clear_item()
+        # clean after ourselves
+        self._keyboardId = None
+        self._description = None
+        self._ascii = None
+        self._comment = None
+        self._languages = None
+        self._territories = None
 
     def _clear_item(self):
         self._item_id = None
         self._item_rank = None
 
+    _text_elements = {
+        # non-dict values
+        'keyboardId': '_keyboardId',
+        'description': '_description',
+        'ascii': '_ascii',
+        'comment': '_comment',
+        # dict items
+        'languageId': '_item_id',
+        'territoryId': '_item_id',
+        'rank': '_item_rank',
+    }
+
+    _start_handlers = {
+        'keyboard': _start_keyboard,
+    }
+
+    _end_handlers = {
+        'keyboard': _end_keyboard,
+        # populating dictionaries
+        'language': _end_ranked_item('_languages'),
+        'territory': _end_ranked_item('_territories'),
+    }
+
 class LanguagesContentHandler(LangtableContentHandler):
     """Handler for SAX events produced when parsing the languages.xml file."""
 
-    def __init__(self):
-        super(LanguagesContentHandler, self).__init__()
+    def __init__(self, db):
+        super(LanguagesContentHandler, self).__init__(db)
         # simple values
         self._languageId = None
         self._iso639_1 = None
@@ -357,7 +613,8 @@ class LanguagesContentHandler(LangtableContentHandler):
         # 'names' element
         self._in_names = False
 
-        # dictionaries
+        # lists of (id, value) pairs, made into dictionaries when
+        # the item is complete
         self._names = None
         self._scripts = None
         self._locales = None
@@ -367,115 +624,110 @@ class LanguagesContentHandler(LangtableContentHandler):
         self._consolefonts = None
         self._timezones = None
 
-    def startElement(self, name, attrs):
-        if name == u"language":
-            self._names = dict()
-            self._scripts = dict()
-            self._locales = dict()
-            self._territories = dict()
-            self._keyboards = dict()
-            self._inputmethods = dict()
-            self._consolefonts = dict()
-            self._timezones = dict()
-
-        # non-dict values
-        elif name == u"languageId" and not self._in_names:
-            # ID of the language
-            self._save_to = "_languageId"
-        elif name == u"iso639-1":
-            self._save_to = "_iso639_1"
-        elif name == u"iso639-2-t":
-            self._save_to = "_iso639_2_t"
-        elif name == u"iso639-2-b":
-            self._save_to = "_iso639_2_b"
-        elif name == u"names":
-            self._in_names = True
-
-        # dict items
-        elif name in (u"scriptId", u"localeId", u"territoryId", u"keyboardId", u"inputmethodId",
-                      u"consolefontId", u"timezoneId"):
-            self._save_to = "_item_id"
-        elif name == u"languageId" and self._in_names:
+    def _start_language(self, attrs):
+        self._names = []
+        self._scripts = []
+        self._locales = []
+        self._territories = []
+        self._keyboards = []
+        self._inputmethods = []
+        self._consolefonts = []
+        self._timezones = []
+
+    def _start_languageId(self, attrs):
+        if self._in_names:
             # ID of the translated name's language
             self._save_to = "_item_id"
-        elif name == u"trName":
-            self._save_to = "_item_name"
-        elif name == u"rank":
-            self._save_to = "_item_rank"
-
-    def endElement(self, name):
-        # we don't allow text to appear on the same level as elements so outside
-        # of an element no text should appear
-        self._save_to = None
+        else:
+            # ID of the language
+            self._save_to = "_languageId"
 
-        if name == u"language":
-            _languages_db[str(self._languageId)] = language_db_item(
-                iso639_1 = self._iso639_1,
-                iso639_2_t = self._iso639_2_t,
-                iso639_2_b = self._iso639_2_b,
-                names = self._names,
-                scripts = self._scripts,
-                locales = self._locales,
-                territories = self._territories,
-                keyboards = self._keyboards,
-                inputmethods = self._inputmethods,
-                consolefonts = self._consolefonts,
-                timezones = self._timezones)
-
-            # clean after ourselves
-            self._languageId = None
-            self._iso639_1 = None
-            self._iso639_2_t = None
-            self._iso639_2_b = None
-            self._names = None
-            self._scripts = None
-            self._locales = None
-            self._territories = None
-            self._keyboards = None
-            self._inputmethods = None
-            self._consolefonts = None
-            self._timezones = None
+    def _start_names(self, attrs):
+        self._in_names = True
+
+    def _end_language(self):
+        self._db[self._languageId] = language_db_item(
+            iso639_1 = self._iso639_1,
+            iso639_2_t = self._iso639_2_t,
+            iso639_2_b = self._iso639_2_b,
+            names = dict(self._names),
+            scripts = dict(self._scripts),
+            locales = dict(self._locales),
+            territories = dict(self._territories),
+            keyboards = dict(self._keyboards),
+            inputmethods = dict(self._inputmethods),
+            consolefonts = dict(self._consolefonts),
+            timezones = dict(self._timezones))
+
+        # clean after ourselves
+        self._languageId = None
+        self._iso639_1 = None
+        self._iso639_2_t = None
+        self._iso639_2_b = None
+        self._names = None
+        self._scripts = None
+        self._locales = None
+        self._territories = None
+        self._keyboards = None
+        self._inputmethods = None
+        self._consolefonts = None
+        self._timezones = None
 
+    def _end_names(self):
         # leaving the "names" element
-        elif name == u"names":
-            self._in_names = False
+        self._in_names = False
 
-        # populating dictionaries
-        elif name == u"name":
-            self._names[str(self._item_id)] = self._item_name
-            self._clear_item()
-        elif name == u"script":
-            self._scripts[str(self._item_id)] = int(self._item_rank)
-            self._clear_item()
-        elif name == u"locale":
-            self._locales[str(self._item_id)] = int(self._item_rank)
-            self._clear_item()
-        elif name == u"territory":
-            self._territories[str(self._item_id)] = int(self._item_rank)
-            self._clear_item()
-        elif name == u"keyboard":
-            self._keyboards[str(self._item_id)] = int(self._item_rank)
-            self._clear_item()
-        elif name == u"inputmethod":
-            self._inputmethods[str(self._item_id)] = int(self._item_rank)
-            self._clear_item()
-        elif name == u"consolefont":
-            self._consolefonts[str(self._item_id)] = int(self._item_rank)
-            self._clear_item()
-        elif name == u"timezone":
-            self._timezones[str(self._item_id)] = int(self._item_rank)
-            self._clear_item()
+    def _end_name(self):
+        self._names.append((self._item_id, self._item_name))
+        self._clear_item()
 
     def _clear_item(self):
         self._item_id = None
         self._item_name = None
         self._item_rank = None
 
+    _text_elements = {
+        # non-dict values
+        'iso639-1': '_iso639_1',
+        'iso639-2-t': '_iso639_2_t',
+        'iso639-2-b': '_iso639_2_b',
+        # dict items
+        'scriptId': '_item_id',
+        'localeId': '_item_id',
+        'territoryId': '_item_id',
+        'keyboardId': '_item_id',
+        'inputmethodId': '_item_id',
+        'consolefontId': '_item_id',
+        'timezoneId': '_item_id',
+        'trName': '_item_name',
+        'rank': '_item_rank',
+    }
+
+    _start_handlers = {
+        'language': _start_language,
+        'languageId': _start_languageId,
+        'names': _start_names,
+    }
+
+    _end_handlers = {
+        'language': _end_language,
+        'names': _end_names,
+        # populating dictionaries
+        'name': _end_name,
+        'script': _end_ranked_item('_scripts'),
+        'locale': _end_ranked_item('_locales'),
+        'territory': _end_ranked_item('_territories'),
+        'keyboard': _end_ranked_item('_keyboards'),
+        'inputmethod': _end_ranked_item('_inputmethods'),
+        'consolefont': _end_ranked_item('_consolefonts'),
+        'timezone': _end_ranked_item('_timezones'),
+    }
+
 class TimezonesContentHandler(LangtableContentHandler):
     """Handler for SAX events produced when parsing the timezones.xml file."""
 
-    def __init__(self):
-        super(TimezonesContentHandler, self).__init__()
+    def __init__(self, db):
+        super(TimezonesContentHandler, self).__init__(db)
         # simple values
         self._timezoneId = None
 
@@ -483,52 +735,51 @@ class TimezonesContentHandler(LangtableContentHandler):
         self._item_id = None
         self._item_name = None
 
-        # dictionaries
+        # lists of (id, value) pairs, made into dictionaries when
+        # the item is complete
         self._names = None
 
-    def startElement(self, name, attrs):
-        if name == u"timezone":
-            self._names = dict()
-
-        # non-dict values
-        elif name == u"timezoneId":
-            # ID of the timezone
-            self._save_to = "_timezoneId"
+    def _start_timezone(self, attrs):
+        self._names = []
 
-        # dict items
-        elif name == u"languageId":
-            # ID of the translated timezone's language
-            self._save_to = "_item_id"
-        elif name == u"trName":
-            self._save_to = "_item_name"
-
-    def endElement(self, name):
-        # we don't allow text to appear on the same level as elements so outside
-        # of an element no text should appear
-        self._save_to = None
+    def _end_timezone(self):
+        self._db[self._timezoneId] = dict(self._names)
 
-        if name == u"timezone":
-            _timezones_db[str(self._timezoneId)] = timezone_db_item(
-                names = self._names)
-
-            # clean after ourselves
-            self._timezoneId = None
-            self._names = None
+        # clean after ourselves
+        self._timezoneId = None
+        self._names = None
 
-        # populating dictionaries
-        elif name == u"name":
-            self._names[str(self._item_id)] = self._item_name
-            self._clear_item()
+    def _end_name(self):
+        self._names.append((self._item_id, self._item_name))
+        self._clear_item()
 
     def _clear_item(self):
         self._item_id = None
         self._item_name = None
 
+    _text_elements = {
+        # ID of the timezone
+        'timezoneId': '_timezoneId',
+        # ID of the translated timezone's language
+        'languageId': '_item_id',
+        'trName': '_item_name',
+    }
+
+    _start_handlers = {
+        'timezone': _start_timezone,
+    }
+
+    _end_handlers = {
+        'timezone': _end_timezone,
+        # populating dictionaries
+        'name': _end_name,
+    }
+
 class TimezoneIdPartsContentHandler(LangtableContentHandler):
     """Handler for SAX events produced when parsing the timezoneidparts.xml file."""
 
-    def __init__(self):
-        super(TimezoneIdPartsContentHandler, self).__init__()
+    def __init__(self, db):
+        super(TimezoneIdPartsContentHandler, self).__init__(db)
         # simple values
         self._timezoneIdPartId = None
 
@@ -536,299 +787,241 @@ class TimezoneIdPartsContentHandler(LangtableContentHandler):
         self._item_id = None
         self._item_name = None
 
-        # dictionaries
+        # lists of (id, value) pairs, made into dictionaries when
+        # the item is complete
         self._names = None
 
-    def startElement(self, name, attrs):
-        if name == u"timezoneIdPart":
-            self._names = dict()
+    def _start_timezoneIdPart(self, attrs):
+        self._names = []
 
-        # non-dict values
-        elif name == u"timezoneIdPartId":
-            # partial timezone ID
-            self._save_to = "_timezoneIdPartId"
+    def _end_timezoneIdPart(self):
+        self._db[self._timezoneIdPartId] = dict(self._names)
 
-        # dict items
-        elif name == u"languageId":
-            # ID of the translated partial timezone ID's language
-            self._save_to = "_item_id"
-        elif name == u"trName":
-            self._save_to = "_item_name"
+        # clean after ourselves
+        self._timezoneIdPartId = None
+        self._names = None
 
-    def endElement(self, name):
-        # we don't allow text to appear on the same level as elements so outside
-        # of an element no text should appear
-        self._save_to = None
+    def _end_name(self):
+        self._names.append((self._item_id, self._item_name))
+        self._clear_item()
 
-        if name == u"timezoneIdPart":
-            _timezoneIdParts_db[str(self._timezoneIdPartId)] = timezoneIdPart_db_item(
-                names = self._names)
+    def _clear_item(self):
+        self._item_id = None
+        self._item_name = None
 
-            # clean after ourselves
-            self._timezoneIdPartId = None
-            self._names = None
+    _text_elements = {
+        # partial timezone ID
+        'timezoneIdPartId': '_timezoneIdPartId',
+        # ID of the translated partial timezone ID's language
+        'languageId': '_item_id',
+        'trName': '_item_name',
+    }
 
+    _start_handlers = {
+        'timezoneIdPart': _start_timezoneIdPart,
+    }
+
+    _end_handlers = {
+        'timezoneIdPart': _end_timezoneIdPart,
         # populating dictionaries
-        elif name == u"name":
-            self._names[str(self._item_id)] = self._item_name
-            self._clear_item()
+        'name': _end_name,
+    }
 
-    def _clear_item(self):
-        self._item_id = None
-        self._item_name = None
+def _sorted_by_rank(ranks):
+    '''
+    Only for internal use. Returns the (id, rank) pairs of a dictionary
+    of ranks sorted by decreasing rank and increasing id.
+
+    The negated ranks are put first into the tuples to sort, this gives
+    the same order as sorting with a key function but the comparisons
+    are done in C.
+    '''
+    return [(id, -negative_rank)
+            for negative_rank, id in sorted([(-rank, id) for id, rank in ranks.items()])]
+
+def _append_names(out, names):
+    '''
+    Only for internal use. Appends the XML lines for a dictionary of
+    translated names to the list out.
+    '''
+    out.append('    <names>\n')
+    for name in sorted(names):
+        out.append('      <name><languageId>%s</languageId><trName>%s</trName></name>\n'
+                   %(name, names[name]))
+    out.append('    </names>\n')
+
+def _append_ranked_items(out, elements, element, ranks):
+    '''
+    Only for internal use. Appends the XML lines for a dictionary of
+    ranks to the list out, for example for elements='locales',
+    element='locale':
+
+        <locales>
+          <locale><localeId>de_DE.UTF-8</localeId><rank>100</rank></locale>
+          ...
+        </locales>
+    '''
+    out.append('    <%s>\n' %elements)
+    line = ('      <%(element)s><%(element)sId>%%s</%(element)sId><rank>%%d</rank></%(element)s>\n'
+            %{'element': element})
+    for id, rank in _sorted_by_rank(ranks):
+        out.append(line %(id, rank))
+    out.append('    </%s>\n' %elements)
 
 def _write_territories_file(file):
     '''
     Only for internal use
+
+    Each territory is formatted into a list of strings which is
+    encoded and written to the (binary) file in one go.
     '''
-    file.write('<?xml version="1.0" encoding="UTF-8"?>\n')
-    file.write('<territories>\n')
+    file.write(b'<?xml version="1.0" encoding="UTF-8"?>\n')
+    file.write(b'<territories>\n')
     for territoryId in sorted(_territories_db):
-        file.write('  <territory>\n')
-        file.write('    <territoryId>'+territoryId+'</territoryId>\n')
-        names = _territories_db[territoryId].names
-        file.write('    <names>\n')
-        for name in sorted(names):
-            file.write(
-                '      <name>'
-                +'<languageId>'+name+'</languageId>'
-                +'<trName>'+names[name]+'</trName>'
-                +'</name>\n')
-        file.write('    </names>\n')
-        scripts = _territories_db[territoryId].scripts
-        file.write('    <scripts>\n')
-        for scriptId, rank in sorted(scripts.items(), key=lambda x: (-1*x[1],x[0])):
-            file.write(
-                '      <script>'
-                +'<scriptId>'+scriptId+'</scriptId>'
-                +'<rank>'+str(rank)+'</rank>'
-                +'</script>\n')
-        file.write('    </scripts>\n')
-        locales = _territories_db[territoryId].locales
-        file.write('    <locales>\n')
-        for localeId, rank in sorted(locales.items(), key=lambda x: (-1*x[1],x[0])):
-            file.write(
-                '      <locale>'
-                +'<localeId>'+localeId+'</localeId>'
-                +'<rank>'+str(rank)+'</rank>'
-                +'</locale>\n')
-        file.write('    </locales>\n')
-        languages = _territories_db[territoryId].languages
-        file.write('    <languages>\n')
-        for languageId, rank in sorted(languages.items(), key=lambda x: (-1*x[1],x[0])):
-            file.write(
-                '      <language>'
-                +'<languageId>'+languageId+'</languageId>'
-                +'<rank>'+str(rank)+'</rank>'
-                +'</language>\n')
-        file.write('    </languages>\n')
-        keyboards = _territories_db[territoryId].keyboards
-        file.write('    <keyboards>\n')
-        for keyboardId, rank in sorted(keyboards.items(), key=lambda x: (-1*x[1],x[0])):
-            file.write(
-                '      <keyboard>'
-                +'<keyboardId>'+keyboardId+'</keyboardId>'
-                +'<rank>'+str(rank)+'</rank>'
-                +'</keyboard>\n')
-        file.write('    </keyboards>\n')
-        inputmethods = _territories_db[territoryId].inputmethods
-        file.write('    <inputmethods>\n')
-        for inputmethodId, rank in sorted(inputmethods.items(), key=lambda x: (-1*x[1],x[0])):
-            file.write(
-                '      <inputmethod>'
-                +'<inputmethodId>'+inputmethodId+'</inputmethodId>'
-                +'<rank>'+str(rank)+'</rank>'
-                +'</inputmethod>\n')
-        file.write('    </inputmethods>\n')
-        consolefonts = _territories_db[territoryId].consolefonts
-        file.write('    <consolefonts>\n')
-        for consolefontId, rank in sorted(consolefonts.items(), key=lambda x: (-1*x[1],x[0])):
-            file.write(
-                '      <consolefont>'
-                +'<consolefontId>'+consolefontId+'</consolefontId>'
-                +'<rank>'+str(rank)+'</rank>'
-                +'</consolefont>\n')
-        file.write('    </consolefonts>\n')
-        timezones = _territories_db[territoryId].timezones
-        file.write('    <timezones>\n')
-        for timezoneId, rank in sorted(timezones.items(), key=lambda x: (-1*x[1],x[0])):
-            file.write(
-                '      <timezone>'
-                +'<timezoneId>'+timezoneId+'</timezoneId>'
-                +'<rank>'+str(rank)+'</rank>'
-                +'</timezone>\n')
-        file.write('    </timezones>\n')
-        file.write('  </territory>\n')
-    file.write('</territories>\n')
+        territory = _territories_db[territoryId]
+        out = []
+        out.append('  <territory>\n')
+        out.append('    <territoryId>%s</territoryId>\n' %territoryId)
+        _append_names(out, territory.names)
+        _append_ranked_items(out, 'scripts', 'script', territory.scripts)
+        _append_ranked_items(out, 'locales', 'locale', territory.locales)
+        _append_ranked_items(out, 'languages', 'language', territory.languages)
+        _append_ranked_items(out, 'keyboards', 'keyboard', territory.keyboards)
+        _append_ranked_items(out, 'inputmethods', 'inputmethod', territory.inputmethods)
+        _append_ranked_items(out, 'consolefonts', 'consolefont', territory.consolefonts)
+        _append_ranked_items(out, 'timezones', 'timezone', territory.timezones)
+        out.append('  </territory>\n')
+        file.write(u''.join(out).encode('UTF-8'))
+    file.write(b'</territories>\n')
     return
 
 def _write_languages_file(file):
     '''
     Only for internal use
+
+    Each language is formatted into a list of strings which is
+    encoded and written to the (binary) file in one go.
     '''
-    file.write('<?xml version="1.0" encoding="UTF-8"?>\n')
-    file.write('<languages>\n')
+    file.write(b'<?xml version="1.0" encoding="UTF-8"?>\n')
+    file.write(b'<languages>\n')
     for languageId in sorted(_languages_db):
-        file.write('  <language>\n')
-        file.write('    <languageId>'+languageId+'</languageId>\n')
-        file.write('    <iso639-1>'+str(_languages_db[languageId].iso639_1)+'</iso639-1>\n')
-        file.write('    <iso639-2-t>'+str(_languages_db[languageId].iso639_2_t)+'</iso639-2-t>\n')
-        file.write('    <iso639-2-b>'+str(_languages_db[languageId].iso639_2_b)+'</iso639-2-b>\n')
-        names = _languages_db[languageId].names
-        file.write('    <names>\n')
-        for name in sorted(names):
-            file.write(
-                '      <name>'
-                +'<languageId>'+name+'</languageId>'
-                +'<trName>'+names[name]+'</trName>'
-                +'</name>\n')
-        file.write('    </names>\n')
-        scripts = _languages_db[languageId].scripts
-        file.write('    <scripts>\n')
-        for scriptId, rank in sorted(scripts.items(), key=lambda x: (-1*x[1],x[0])):
-            file.write(
-                '      <script>'
-                +'<scriptId>'+scriptId+'</scriptId>'
-                +'<rank>'+str(rank)+'</rank>'
-                +'</script>\n')
-        file.write('    </scripts>\n')
-        locales = _languages_db[languageId].locales
-        file.write('    <locales>\n')
-        for localeId, rank in sorted(locales.items(), key=lambda x: (-1*x[1],x[0])):
-            file.write(
-                '      <locale>'
-                +'<localeId>'+localeId+'</localeId>'
-                +'<rank>'+str(rank)+'</rank>'
-                +'</locale>\n')
-        file.write('    </locales>\n')
-        territories = _languages_db[languageId].territories
-        file.write('    <territories>\n')
-        for territoryId, rank in sorted(territories.items(), key=lambda x: (-1*x[1],x[0])):
-            file.write(
-                '      <territory>'
-                +'<territoryId>'+territoryId+'</territoryId>'
-                +'<rank>'+str(rank)+'</rank>'
-                +'</territory>\n')
-        file.write('    </territories>\n')
-        keyboards = _languages_db[languageId].keyboards
-        file.write('    <keyboards>\n')
-        for keyboardId, rank in sorted(keyboards.items(), key=lambda x: (-1*x[1],x[0])):
-            file.write(
-                '      <keyboard>'
-                +'<keyboardId>'+keyboardId+'</keyboardId>'
-                +'<rank>'+str(rank)+'</rank>'
-                +'</keyboard>\n')
-        file.write('    </keyboards>\n')
-        inputmethods = _languages_db[languageId].inputmethods
-        file.write('    <inputmethods>\n')
-        for inputmethodId, rank in sorted(inputmethods.items(), key=lambda x: (-1*x[1],x[0])):
-            file.write(
-                '      <inputmethod>'
-                +'<inputmethodId>'+inputmethodId+'</inputmethodId>'
-                +'<rank>'+str(rank)+'</rank>'
-                +'</inputmethod>\n')
-        file.write('    </inputmethods>\n')
-        consolefonts = _languages_db[languageId].consolefonts
-        file.write('    <consolefonts>\n')
-        for consolefontId, rank in sorted(consolefonts.items(), key=lambda x: (-1*x[1],x[0])):
-            file.write(
-                '      <consolefont>'
-                +'<consolefontId>'+consolefontId+'</consolefontId>'
-                +'<rank>'+str(rank)+'</rank>'
-                +'</consolefont>\n')
-        file.write('    </consolefonts>\n')
-        timezones = _languages_db[languageId].timezones
-        file.write('    <timezones>\n')
-        for timezoneId, rank in sorted(timezones.items(), key=lambda x: (-1*x[1],x[0])):
-            file.write(
-                '      <timezone>'
-                +'<timezoneId>'+timezoneId+'</timezoneId>'
-                +'<rank>'+str(rank)+'</rank>'
-                +'</timezone>\n')
-        file.write('    </timezones>\n')
-        file.write('  </language>\n')
-    file.write('</languages>\n')
+        language = _languages_db[languageId]
+        out = []
+        out.append('  <language>\n')
+        out.append('    <languageId>%s</languageId>\n' %languageId)
+        out.append('    <iso639-1>%s</iso639-1>\n' %language.iso639_1)
+        out.append('    <iso639-2-t>%s</iso639-2-t>\n' %language.iso639_2_t)
+        out.append('    <iso639-2-b>%s</iso639-2-b>\n' %language.iso639_2_b)
+        _append_names(out, language.names)
+        _append_ranked_items(out, 'scripts', 'script', language.scripts)
+        _append_ranked_items(out, 'locales', 'locale', language.locales)
+        _append_ranked_items(out, 'territories', 'territory', language.territories)
+        _append_ranked_items(out, 'keyboards', 'keyboard', language.keyboards)
+        _append_ranked_items(out, 'inputmethods', 'inputmethod', language.inputmethods)
+        _append_ranked_items(out, 'consolefonts', 'consolefont', language.consolefonts)
+        _append_ranked_items(out, 'timezones', 'timezone', language.timezones)
+        out.append('  </language>\n')
+        file.write(u''.join(out).encode('UTF-8'))
+    file.write(b'</languages>\n')
     return
 
 def _write_keyboards_file(file):
     '''
     Only for internal use
+
+    Each keyboard is formatted into a list of strings which is
+    encoded and written to the (binary) file in one go.
     '''
-    file.write('<?xml version="1.0" encoding="UTF-8"?>\n')
-    file.write('<keyboards>\n')
+    file.write(b'<?xml version="1.0" encoding="UTF-8"?>\n')
+    file.write(b'<keyboards>\n')
     for keyboardId in sorted(_keyboards_db):
-        file.write('  <keyboard>\n')
-        file.write('    <keyboardId>'+keyboardId+'</keyboardId>\n')
-        file.write('    <description>'+_keyboards_db[keyboardId].description+'</description>\n')
-        file.write('    <ascii>'+str(_keyboards_db[keyboardId].ascii)+'</ascii>\n')
-        if _keyboards_db[keyboardId].comment != None:
-            file.write('    <comment>'+_keyboards_db[keyboardId].comment+'</comment>\n')
-        languages = _keyboards_db[keyboardId].languages
-        file.write('    <languages>\n')
-        for languageId, rank in sorted(languages.items(), key=lambda x: (-1*x[1],x[0])):
-            file.write(
-                '      <language>'
-                +'<languageId>'+languageId+'</languageId>'
-                +'<rank>'+str(rank)+'</rank>'
-                +'</language>\n')
-        file.write('    </languages>\n')
-        territories = _keyboards_db[keyboardId].territories
-        file.write('    <territories>\n')
-        for territoryId, rank in sorted(territories.items(), key=lambda x: (-1*x[1],x[0])):
-            file.write(
-                '      <territory>'
-                +'<territoryId>'+territoryId+'</territoryId>'
-                +'<rank>'+str(rank)+'</rank>'
-                +'</territory>\n')
-        file.write('    </territories>\n')
-        file.write('  </keyboard>\n')
-    file.write('</keyboards>\n')
+        keyboard = _keyboards_db[keyboardId]
+        out = []
+        out.append('  <keyboard>\n')
+        out.append('    <keyboardId>%s</keyboardId>\n' %keyboardId)
+        out.append('    <description>%s</description>\n' %keyboard.description)
+        out.append('    <ascii>%s</ascii>\n' %keyboard.ascii)
+        if keyboard.comment != None:
+            out.append('    <comment>%s</comment>\n' %keyboard.comment)
+        _append_ranked_items(out, 'languages', 'language', keyboard.languages)
+        _append_ranked_items(out, 'territories', 'territory', keyboard.territories)
+        out.append('  </keyboard>\n')
+        file.write(u''.join(out).encode('UTF-8'))
+    file.write(b'</keyboards>\n')
     return
 
 def _write_timezones_file(file):
     '''
     Only for internal use
+
+    Each timezone is formatted into a list of strings which is
+    encoded and written to the (binary) file in one go.
     '''
-    file.write('<?xml version="1.0" encoding="UTF-8"?>\n')
-    file.write('<timezones>\n')
+    file.write(b'<?xml version="1.0" encoding="UTF-8"?>\n')
+    file.write(b'<timezones>\n')
     for timezoneId in sorted(_timezones_db):
-        file.write('  <timezone>\n')
-        file.write('    <timezoneId>'+timezoneId+'</timezoneId>\n')
-        names = _timezones_db[timezoneId].names
-        file.write('    <names>\n')
-        for name in sorted(names):
-            file.write(
-                '      <name>'
-                +'<languageId>'+name+'</languageId>'
-                +'<trName>'+names[name]+'</trName>'
-                +'</name>\n')
-        file.write('    </names>\n')
-        file.write('  </timezone>\n')
-    file.write('</timezones>\n')
+        out = []
+        out.append('  <timezone>\n')
+        out.append('    <timezoneId>%s</timezoneId>\n' %timezoneId)
+        _append_names(out, _timezones_db[timezoneId])
+        out.append('  </timezone>\n')
+        file.write(u''.join(out).encode('UTF-8'))
+    file.write(b'</timezones>\n')
     return
 
 def _write_timezoneIdParts_file(file):
     '''
     Only for internal use
+
+    Each timezoneIdPart is formatted into a list of strings which is
+    encoded and written to the (binary) file in one go.
     '''
-    file.write('<?xml version="1.0" encoding="UTF-8"?>\n')
-    file.write('<timezoneIdParts>\n')
+    file.write(b'<?xml version="1.0" encoding="UTF-8"?>\n')
+    file.write(b'<timezoneIdParts>\n')
     for timezoneIdPartId in sorted(_timezoneIdParts_db):
-        file.write('  <timezoneIdPart>\n')
-        file.write('    <timezoneIdPartId>'+timezoneIdPartId+'</timezoneIdPartId>\n')
-        names = _timezoneIdParts_db[timezoneIdPartId].names
-        file.write('    <names>\n')
-        for name in sorted(names):
-            file.write(
-                '      <name>'
-                +'<languageId>'+name+'</languageId>'
-                +'<trName>'+names[name]+'</trName>'
-                +'</name>\n')
-        file.write('    </names>\n')
-        file.write('  </timezoneIdPart>\n')
-    file.write('</timezoneIdParts>\n')
+        out = []
+        out.append('  <timezoneIdPart>\n')
+        out.append('    <timezoneIdPartId>%s</timezoneIdPartId>\n' %timezoneIdPartId)
+        _append_names(out, _timezoneIdParts_db[timezoneIdPartId])
+        out.append('  </timezoneIdPart>\n')
+        file.write(u''.join(out).encode('UTF-8'))
+    file.write(b'</timezoneIdParts>\n')
     return
 
+def _lxml_parse(file, db):
+    """
+    Only for internal use. Parses a given file object with lxml, which
+    builds the elements in C, and stores the item read from each
+    complete record element by the function in _lxml_readers in db.
+    This needs far fewer calls into Python than the SAX events of
+    expat. Elements already read are removed to keep the memory use
+    low.
+    """
+
+    for event, element in _lxml_etree.iterparse(
+            file, events=('end',), tag=tuple(_lxml_readers)):
+        parent = element.getparent()
+        if parent is None or parent.getparent() is not None:
+            # not a record, for example a <territory> in a <language>
+            continue
+        itemId, item = _lxml_readers[element.tag](element)
+        db[itemId] = item
+        element.clear()
+        while element.getprevious() is not None:
+            del parent[0]
+
+def _parse(file, sax_handler):
+    """
+    Only for internal use. Parses a given file object with lxml if it
+    is available and with expat otherwise. Both store the items read
+    in the database of the SAX handler.
+    """
+
+    if _lxml_etree is not None:
+        _lxml_parse(file, sax_handler._db)
+    else:
+        _expat_parse(file, sax_handler)
+
 def _expat_parse(file, sax_handler):
     """
     Only for internal use. Parses a given file object with a given SAX handler
@@ -836,80 +1029,269 @@ def _expat_parse(file, sax_handler):
     """
 
     parser = xml.parsers.expat.ParserCreate()
+    # Let expat collect the text data of an element and report it in
+    # one event instead of calling the Python handler for every line
+    # or buffer boundary:
+    parser.buffer_text = True
+    parser.buffer_size = 65536
     parser.StartElementHandler = sax_handler.startElement
     parser.EndElementHandler = sax_handler.endElement
     parser.CharacterDataHandler = sax_handler.characters
     parser.ParseFile(file)
 
-def _read_file(datadir, filename, sax_handler):
+# The cache files are specific to the major version of Python because
+# Python 2 and Python 3 use different string types for the data, and
+# the Python 2 and Python 3 versions of langtable share the data
+# directory:
+_cache_suffix = '.py%d.pickle' %sys.version_info[0]
+
+# Stored in every cache file, a cache with a different format version is
+# not used. Increase this whenever the layout of the databases changes:
+#
+# 2: _timezones_db and _timezoneIdParts_db map the ids directly to the
+#    dictionaries of translated names instead of to items with a
+#    “names” attribute
+_cache_format = 2
+
+def _open_for_reading(path):
+    '''
+    Only for internal use. Opens a file for reading in binary mode,
+    files ending in “.gz” are decompressed while reading.
+    '''
+    if path.endswith('.gz'):
+        return gzip.open(path, mode='rb')
+    return open(path, mode='rb')
+
+# The data files are written with large buffers because they are
+# written in many small pieces:
+_write_buffer_size = 1<<20
+
+def _open_for_writing(path):
+    '''
+    Only for internal use. Opens a file for writing in binary mode,
+    files ending in “.gz” are compressed with the best compression, they
+    are written only once but read often.
+    '''
+    if path.endswith('.gz'):
+        return gzip.open(path, mode='wb', compresslevel=9)
+    return io.open(path, mode='wb', buffering=_write_buffer_size)
+
+def _cache_path(path):
+    '''
+    Only for internal use. Returns the path of the pickle cache for the
+    XML file at path, the cache is compressed if the XML file is.
+    '''
+    if path.endswith('.gz'):
+        return path[:-len('.gz')]+_cache_suffix+'.gz'
+    return path+_cache_suffix
+
+def _read_cache(path, db, db_item):
+    '''
+    Only for internal use. Fills db with the items stored in the
+    pickle cache file at path. If db_item is None, the items are
+    dictionaries of translated names and are stored in db as they are.
+
+    Raises ValueError and leaves db unchanged if the cache has a
+    different format version or items of the wrong type.
+    '''
+    with _open_for_reading(path) as file:
+        logging.info('reading cache file=%s' %file)
+        # reading everything at once is faster than letting pickle
+        # read many small pieces from a gzip file
+        cache = pickle.loads(file.read())
+    if not isinstance(cache, dict) or cache.get('format') != _cache_format:
+        raise ValueError('cache does not have format version %d' %_cache_format)
+    items = {}
+    if db_item is None:
+        for key, names in cache['items'].items():
+            if (not isinstance(names, dict)
+                or not all([isinstance(name, type(u'')) or isinstance(name, str)
+                            for name in names.values()])):
+                raise ValueError('cache item %s is not a dictionary of names' %key)
+            items[key] = names
+    else:
+        slots = set(db_item.__slots__)
+        for key, fields in cache['items'].items():
+            if not isinstance(fields, dict) or set(fields) != slots:
+                raise ValueError('cache item %s is not a %s' %(key, db_item.__name__))
+            items[key] = db_item(**fields)
+    db.update(items)
+
+def _write_cache(path, db):
+    '''
+    Only for internal use. Stores the items of db in a pickle cache
+    file at path which can be read by _read_cache().
+    '''
+    items = {}
+    for key in db:
+        item = db[key]
+        if isinstance(item, dict):
+            items[key] = item
+        else:
+            items[key] = dict(
+                (name, getattr(item, name)) for name in item.__slots__)
+    with _open_for_writing(path) as file:
+        logging.info('writing cache file=%s' %file)
+        pickle.dump({'format': _cache_format, 'items': items},
+                    file, pickle.HIGHEST_PROTOCOL)
+
+def _cache_is_fresh(cache_path, xml_path):
+    '''
+    Only for internal use. A cache file is only used if it is not
+    older than the XML file it was generated from.
+    '''
+    cache_mtime = os.path.getmtime(cache_path)
+    for path in [xml_path+'.gz', xml_path]:
+        if os.path.isfile(path) and os.path.getmtime(path) > cache_mtime:
+            return False
+    return True
+
+def _read_file(datadir, filename, sax_handler, db, db_item, use_cache=True):
     '''
     Only for internal use
+
+    Fills db with the items of a fresh cache in datadir if there is
+    one and with the items sax_handler reads from the XML file
+    otherwise, sax_handler has to be created with the same db.
+
+    The gzipped files are tried first because “make install”
+    installs the data files gzipped. They are decompressed while
+    parsing, without writing the uncompressed data anywhere.
+
+    If use_cache is False, the XML file is parsed even if there is a
+    fresh cache.
     '''
 
+    # Unpickling can run arbitrary code, so caches are only read from
+    # the installed data directory, never from the current directory.
+    path = os.path.join(datadir, filename)
+    for cache_path in [_cache_path(path+'.gz'), _cache_path(path)]:
+        if (use_cache
+            and os.path.isfile(cache_path)
+            and _cache_is_fresh(cache_path, path)):
+            try:
+                _read_cache(cache_path, db, db_item)
+                return
+            except Exception as e:
+                logging.info('cannot read cache file=%s: %s' %(cache_path, e))
     for dir in [datadir, '.']:
         path = os.path.join(dir, filename)
-        if os.path.isfile(path):
-            with open(path, mode='rb') as file:
-                logging.info('reading file=%s' %file)
-                _expat_parse(file, sax_handler)
-            return
-        path = os.path.join(dir, filename+'.gz')
-        if os.path.isfile(path):
-            with gzip.open(path, mode='rb') as file:
-                logging.info('reading file=%s' %file)
-                _expat_parse(file, sax_handler)
-            return
+        for xml_path in [path+'.gz', path]:
+            if os.path.isfile(xml_path):
+                with _open_for_reading(xml_path) as file:
+                    logging.info('reading file=%s' %file)
+                    _parse(file, sax_handler)
+                return
     logging.info('no readable file found.')
 
 def _write_files(territoriesfilename, languagesfilename, keyboardsfilename, timezonesfilename, timezoneidpartsfilename):
     '''
     Only for internal use
+
+    Files whose names end in “.gz” are written gzipped.
     '''
-    with open(territoriesfilename, 'w') as territoriesfile:
+    _load(*_data_files)
+    with _open_for_writing(territoriesfilename) as territoriesfile:
         logging.info("writing territories file=%s" %territoriesfile)
         _write_territories_file(territoriesfile)
-    with open(languagesfilename, 'w') as languagesfile:
+    with _open_for_writing(languagesfilename) as languagesfile:
         logging.info("writing languages file=%s" %languagesfile)
         _write_languages_file(languagesfile)
-    with open(keyboardsfilename, 'w') as keyboardsfile:
+    with _open_for_writing(keyboardsfilename) as keyboardsfile:
         logging.info("writing keyboards file=%s" %keyboardsfile)
         _write_keyboards_file(keyboardsfile)
-    with open(keyboardsfilename, 'w') as keyboardsfile:
+    with _open_for_writing(keyboardsfilename) as keyboardsfile:
         logging.info("writing keyboards file=%s" %keyboardsfile)
         _write_keyboards_file(keyboardsfile)
-    with open(timezonesfilename, 'w') as timezonesfile:
+    with _open_for_writing(timezonesfilename) as timezonesfile:
         logging.info("writing timezones file=%s" %timezonesfile)
         _write_timezones_file(timezonesfile)
-    with open(timezoneidpartsfilename, 'w') as timezoneidpartsfile:
+    with _open_for_writing(timezoneidpartsfilename) as timezoneidpartsfile:
         logging.info("writing timezoneidparts file=%s" %timezoneidpartsfile)
         _write_timezoneIdParts_file(timezoneidpartsfile)
     return
 
-def _dictionary_to_ranked_list(dict, reverse=True):
-    sorted_list = []
-    for item in sorted(dict, key=lambda x: (dict.get(x), x), reverse=reverse):
-        if dict[item] != 0:
-            sorted_list.append([item, dict[item]])
-    return sorted_list
+def _write_cache_files(datadir):
+    '''
+    Only for internal use. Parses the XML data files in datadir and
+    writes gzipped pickle caches for them next to them, “make install”
+    and the spec file use this after installing the data files.
+
+    Existing caches are never read here. gzip keeps the modification
+    time of the XML files, so on a reinstall an old cache would look
+    fresh and would be written again instead of the new data.
+    '''
+    with _load_lock:
+        for name in _data_files:
+            _data_files[name][2].clear()
+            _read_data_file(datadir, name, use_cache=False)
+    _clear_caches()
+    for name in _data_files:
+        filename, content_handler, db, db_item = _data_files[name]
+        _write_cache(_cache_path(os.path.join(datadir, filename+'.gz')), db)
+    return
+
+# sort key for (item, rank) tuples, ranks first and items on equal ranks:
+_rank_and_item = operator.itemgetter(1, 0)
+
+def _dictionary_to_ranked_tuple(dict, reverse=True):
+    return tuple(sorted([item_rank for item_rank in dict.items()
+                         if item_rank[1] != 0],
+                        key=_rank_and_item, reverse=reverse))
 
 def _ranked_list_to_list(ranked_list):
-    return list(map(lambda x: x[0], ranked_list))
+    return [item for item, rank in ranked_list]
 
 def _make_ranked_list_concise(ranked_list, cut_off_factor=1000):
     if not len(ranked_list) > 1:
         return ranked_list
     for i in range(0,len(ranked_list)-1):
-        if ranked_list[i][1]/ranked_list[i+1][1] > cut_off_factor:
+        # compare with a product instead of dividing, this is the same
+        # for the positive ranks in the list and does not depend on
+        # whether “/” is integer division (Python 2) or not (Python 3)
+        if ranked_list[i][1] > ranked_list[i+1][1] * cut_off_factor:
             ranked_list = ranked_list[0:i+1]
             break
     return ranked_list
 
+def _rankings(dict):
+    '''
+    Only for internal use. Returns the items of a dictionary of ranks
+    as a tuple of (item, rank) tuples sorted by decreasing rank, both
+    complete and made concise. The _ranked_*() functions memoize this
+    because the same few languages and territories are asked for again
+    and again, so neither the sorting nor cutting off the low ranks is
+    repeated for the same query.
+    '''
+    ranked_tuple = _dictionary_to_ranked_tuple(dict)
+    return (ranked_tuple, _make_ranked_list_concise(ranked_tuple))
+
+def _ranked_tuple_to_result(rankings, concise, show_weights):
+    '''
+    Only for internal use. Returns the result of a list_*() function
+    from the cached rankings returned by _rankings(). The caller gets
+    new lists which it may change without changing the cached tuples.
+    '''
+    if concise:
+        ranked_tuple = rankings[1]
+    else:
+        ranked_tuple = rankings[0]
+    if show_weights:
+        return [[item, rank] for item, rank in ranked_tuple]
+    return _ranked_list_to_list(ranked_tuple)
+
+@_lru_cache(maxsize=4096)
 def _parse_and_split_languageId(languageId=None, scriptId=None, territoryId=None):
     '''
     Parses languageId and if it contains a valid ICU locale id,
     returns the values for language, script, and territory found
     in languageId instead of the original values given.
 
+    The result depends only on the arguments, therefore it is cached,
+    the same few locale ids are usually queried over and over again.
+    The functions in this module pass the arguments by position, the
+    cache can look these up faster than keyword arguments.
+
     Before parsing, it replaces glibc names for scripts like “latin”
     with the iso-15924 script names like “Latn”, both in the
     languageId and the scriptId parameter. I.e.  language id like
@@ -923,13 +1305,13 @@ def _parse_and_split_languageId(languageId=None, scriptId=None, territoryId=None
             languageId = languageId[:dot_index] + languageId[at_index:]
         elif dot_index >= 0:
             languageId = languageId[:dot_index]
-    for key in _glibc_script_ids:
-        if scriptId:
-            scriptId = scriptId.replace(key, _glibc_script_ids[key])
-        if languageId:
-            if languageId.endswith('@'+key):
-                scriptId = _glibc_script_ids[key]
-            languageId = languageId.replace(key, _glibc_script_ids[key])
+    if scriptId:
+        scriptId = _glibc_script_pattern.sub(_replace_glibc_script_id, scriptId)
+    if languageId:
+        at, option = languageId.rpartition('@')[1:]
+        if at and option in _glibc_script_ids:
+            scriptId = _glibc_script_ids[option]
+        languageId = _glibc_script_pattern.sub(_replace_glibc_script_id, languageId)
     if (languageId):
         match = _cldr_locale_pattern.match(languageId)
         if match:
@@ -949,6 +1331,54 @@ def _parse_and_split_languageId(languageId=None, scriptId=None, territoryId=None
             scriptId = 'Hant'
     return (languageId, scriptId, territoryId)
 
+@_lru_cache(maxsize=1024)
+def _icu_locale_ids(languageId, scriptId, territoryId):
+    '''
+    Only for internal use. Returns a tuple of the ICU locale ids which
+    can be built from the language, script, and territory given, the
+    most specific one first. These are the ids to try when looking up
+    a translation.
+
+    The tuples are cached, so the strings are built only once for the
+    few query languages in use, even when names are looked up for
+    many different languages or territories.
+    '''
+    icuLocaleIds = []
+    if languageId:
+        if scriptId and territoryId:
+            icuLocaleIds.append(languageId+'_'+scriptId+'_'+territoryId)
+        if scriptId:
+            icuLocaleIds.append(languageId+'_'+scriptId)
+        if territoryId:
+            icuLocaleIds.append(languageId+'_'+territoryId)
+        icuLocaleIds.append(languageId)
+    return tuple(icuLocaleIds)
+
+def _lookup_name(names, icuLocaleIdQueries):
+    '''
+    Only for internal use. Returns the name for the first of the ICU
+    locale ids in icuLocaleIdQueries which is found in the dictionary
+    names, or None if none of them is found.
+    '''
+    for icuLocaleIdQuery in icuLocaleIdQueries:
+        name = names.get(icuLocaleIdQuery)
+        if name is not None:
+            return name
+    return None
+
+def _lookup_language_name(icuLocaleId, icuLocaleIdQueries):
+    '''
+    Only for internal use. Returns the name of the language with the
+    ICU locale id icuLocaleId translated to the first of the ICU
+    locale ids in icuLocaleIdQueries it is translated to. Returns None
+    if the language is unknown or has no such translation.
+    '''
+    language = _languages_db.get(icuLocaleId)
+    if language is None:
+        return None
+    return _lookup_name(language.names, icuLocaleIdQueries)
+
+@_lru_cache(maxsize=4096)
 def territory_name(territoryId = None, languageIdQuery = None, scriptIdQuery = None, territoryIdQuery = None):
     u'''Query translations of territory names
 
@@ -979,29 +1409,18 @@ def territory_name(territoryId = None, languageIdQuery = None, scriptIdQuery = N
     >>> print(territory_name(territoryId="CH", languageIdQuery="ja"))
     スイス
     '''
+    _load('territories')
     languageIdQuery, scriptIdQuery, territoryIdQuery = _parse_and_split_languageId(
-        languageId=languageIdQuery,
-        scriptId=scriptIdQuery,
-        territoryId=territoryIdQuery)
+        languageIdQuery, scriptIdQuery, territoryIdQuery)
     if territoryId in _territories_db:
-        if languageIdQuery and scriptIdQuery and territoryIdQuery:
-            icuLocaleIdQuery = languageIdQuery+'_'+scriptIdQuery+'_'+territoryIdQuery
-            if icuLocaleIdQuery in _territories_db[territoryId].names:
-                return _territories_db[territoryId].names[icuLocaleIdQuery]
-        if languageIdQuery and scriptIdQuery:
-            icuLocaleIdQuery = languageIdQuery+'_'+scriptIdQuery
-            if icuLocaleIdQuery in _territories_db[territoryId].names:
-                return _territories_db[territoryId].names[icuLocaleIdQuery]
-        if languageIdQuery and territoryIdQuery:
-            icuLocaleIdQuery = languageIdQuery+'_'+territoryIdQuery
-            if icuLocaleIdQuery in _territories_db[territoryId].names:
-                return _territories_db[territoryId].names[icuLocaleIdQuery]
-        if languageIdQuery:
-            icuLocaleIdQuery = languageIdQuery
-            if icuLocaleIdQuery in _territories_db[territoryId].names:
-                return _territories_db[territoryId].names[icuLocaleIdQuery]
+        name = _lookup_name(
+            _territories_db[territoryId].names,
+            _icu_locale_ids(languageIdQuery, scriptIdQuery, territoryIdQuery))
+        if name is not None:
+            return name
     return ''
 
+@_lru_cache(maxsize=4096)
 def language_name(languageId = None, scriptId = None, territoryId = None, languageIdQuery = None, scriptIdQuery = None, territoryIdQuery = None):
     u'''Query translations of language names
 
@@ -1052,92 +1471,41 @@ def language_name(languageId = None, scriptId = None, territoryId = None, langua
     Serbian (Latin)
 
     '''
+    _load('languages', 'territories')
     languageId, scriptId, territoryId = _parse_and_split_languageId(
-        languageId=languageId,
-        scriptId=scriptId,
-        territoryId=territoryId)
-    languageIdQuery, scriptIdQuery, territoryIdQuery = _parse_and_split_languageId(
-        languageId=languageIdQuery,
-        scriptId=scriptIdQuery,
-        territoryId=territoryIdQuery)
+        languageId, scriptId, territoryId)
+    if languageIdQuery:
+        languageIdQuery, scriptIdQuery, territoryIdQuery = _parse_and_split_languageId(
+            languageIdQuery, scriptIdQuery, territoryIdQuery)
     if not languageIdQuery:
-        # get the endonym
+        # get the endonym, the script and territory of the query do
+        # not matter then and need not be parsed
         languageIdQuery = languageId
         scriptIdQuery = scriptId
         territoryIdQuery = territoryId
+    icuLocaleIdQueries = _icu_locale_ids(
+        languageIdQuery, scriptIdQuery, territoryIdQuery)
     if languageId and scriptId and territoryId:
-        icuLocaleId = languageId+'_'+scriptId+'_'+territoryId
-        if icuLocaleId in _languages_db:
-            if languageIdQuery and scriptIdQuery and territoryIdQuery:
-                icuLocaleIdQuery = languageIdQuery+'_'+scriptIdQuery+'_'+territoryIdQuery
-                if icuLocaleIdQuery in _languages_db[icuLocaleId].names:
-                    return _languages_db[icuLocaleId].names[icuLocaleIdQuery]
-            if languageIdQuery and scriptIdQuery:
-                icuLocaleIdQuery = languageIdQuery+'_'+scriptIdQuery
-                if icuLocaleIdQuery in _languages_db[icuLocaleId].names:
-                    return _languages_db[icuLocaleId].names[icuLocaleIdQuery]
-            if  languageIdQuery and  territoryIdQuery:
-                icuLocaleIdQuery = languageIdQuery+'_'+territoryIdQuery
-                if icuLocaleIdQuery in _languages_db[icuLocaleId].names:
-                    return _languages_db[icuLocaleId].names[icuLocaleIdQuery]
-            if languageIdQuery:
-                icuLocaleIdQuery = languageIdQuery
-                if icuLocaleIdQuery in _languages_db[icuLocaleId].names:
-                    return _languages_db[icuLocaleId].names[icuLocaleIdQuery]
+        name = _lookup_language_name(
+            languageId+'_'+scriptId+'_'+territoryId, icuLocaleIdQueries)
+        if name is not None:
+            return name
     if languageId and scriptId:
-        icuLocaleId = languageId+'_'+scriptId
-        if icuLocaleId in _languages_db:
+        lname = _lookup_language_name(
+            languageId+'_'+scriptId, icuLocaleIdQueries)
+        if lname is not None:
             cname = territory_name(territoryId=territoryId,
                                    languageIdQuery=languageIdQuery,
                                    scriptIdQuery=scriptIdQuery,
                                    territoryIdQuery=territoryIdQuery)
-            if languageIdQuery and  scriptIdQuery and territoryIdQuery:
-                icuLocaleIdQuery = languageIdQuery+'_'+scriptIdQuery+'_'+territoryIdQuery
-                if icuLocaleIdQuery in _languages_db[icuLocaleId].names:
-                    lname = _languages_db[icuLocaleId].names[icuLocaleIdQuery]
-                    if cname:
-                        return lname + ' ('+cname+')'
-                    return lname
-            if languageIdQuery and  scriptIdQuery:
-                icuLocaleIdQuery = languageIdQuery+'_'+scriptIdQuery
-                if icuLocaleIdQuery in _languages_db[icuLocaleId].names:
-                    lname = _languages_db[icuLocaleId].names[icuLocaleIdQuery]
-                    if cname:
-                        return lname + ' ('+cname+')'
-                    return lname
-            if  languageIdQuery and  territoryIdQuery:
-                icuLocaleIdQuery = languageIdQuery+'_'+territoryIdQuery
-                if icuLocaleIdQuery in _languages_db[icuLocaleId].names:
-                    lname = _languages_db[icuLocaleId].names[icuLocaleIdQuery]
-                    if cname:
-                        return lname + ' ('+cname+')'
-                    return lname
-            if languageIdQuery:
-                icuLocaleIdQuery = languageIdQuery
-                if icuLocaleIdQuery in _languages_db[icuLocaleId].names:
-                    lname = _languages_db[icuLocaleId].names[icuLocaleIdQuery]
-                    if cname:
-                        return lname + ' ('+cname+')'
-                    return lname
+            if cname:
+                return lname + ' ('+cname+')'
+            return lname
     if languageId and territoryId:
-        icuLocaleId = languageId+'_'+territoryId
-        if icuLocaleId in _languages_db:
-            if languageIdQuery and  scriptIdQuery and territoryIdQuery:
-                icuLocaleIdQuery = languageIdQuery+'_'+scriptIdQuery+'_'+territoryIdQuery
-                if icuLocaleIdQuery in _languages_db[icuLocaleId].names:
-                    return _languages_db[icuLocaleId].names[icuLocaleIdQuery]
-            if languageIdQuery and  scriptIdQuery:
-                icuLocaleIdQuery = languageIdQuery+'_'+scriptIdQuery
-                if icuLocaleIdQuery in _languages_db[icuLocaleId].names:
-                    return _languages_db[icuLocaleId].names[icuLocaleIdQuery]
-            if  languageIdQuery and  territoryIdQuery:
-                icuLocaleIdQuery = languageIdQuery+'_'+territoryIdQuery
-                if icuLocaleIdQuery in _languages_db[icuLocaleId].names:
-                    return _languages_db[icuLocaleId].names[icuLocaleIdQuery]
-            if languageIdQuery:
-                icuLocaleIdQuery = languageIdQuery
-                if icuLocaleIdQuery in _languages_db[icuLocaleId].names:
-                    return _languages_db[icuLocaleId].names[icuLocaleIdQuery]
+        name = _lookup_language_name(
+            languageId+'_'+territoryId, icuLocaleIdQueries)
+        if name is not None:
+            return name
         lname = language_name(languageId=languageId,
                               languageIdQuery=languageIdQuery,
                               scriptIdQuery=scriptIdQuery,
@@ -1149,24 +1517,9 @@ def language_name(languageId = None, scriptId = None, territoryId = None, langua
         if lname and cname:
             return lname + ' ('+cname+')'
     if languageId:
-        icuLocaleId = languageId
-        if icuLocaleId in _languages_db:
-            if languageIdQuery and  scriptIdQuery and territoryIdQuery:
-                icuLocaleIdQuery = languageIdQuery+'_'+scriptIdQuery+'_'+territoryIdQuery
-                if icuLocaleIdQuery in _languages_db[icuLocaleId].names:
-                    return _languages_db[icuLocaleId].names[icuLocaleIdQuery]
-            if languageIdQuery and  scriptIdQuery:
-                icuLocaleIdQuery = languageIdQuery+'_'+scriptIdQuery
-                if icuLocaleIdQuery in _languages_db[icuLocaleId].names:
-                    return _languages_db[icuLocaleId].names[icuLocaleIdQuery]
-            if  languageIdQuery and  territoryIdQuery:
-                icuLocaleIdQuery = languageIdQuery+'_'+territoryIdQuery
-                if icuLocaleIdQuery in _languages_db[icuLocaleId].names:
-                    return _languages_db[icuLocaleId].names[icuLocaleIdQuery]
-            if languageIdQuery:
-                icuLocaleIdQuery = languageIdQuery
-                if icuLocaleIdQuery in _languages_db[icuLocaleId].names:
-                    return _languages_db[icuLocaleId].names[icuLocaleIdQuery]
+        name = _lookup_language_name(languageId, icuLocaleIdQueries)
+        if name is not None:
+            return name
     return ''
 
 def _timezone_name_from_id_parts(timezoneId = None, icuLocaleIdQuery = None):
@@ -1178,11 +1531,12 @@ def _timezone_name_from_id_parts(timezoneId = None, icuLocaleIdQuery = None):
     timezoneId_parts = timezoneId.split('/')
     part_names = []
     for timezoneId_part in timezoneId_parts:
-        if timezoneId_part not in _timezoneIdParts_db:
+        names = _timezoneIdParts_db.get(timezoneId_part)
+        if names is None:
             part_names.append(timezoneId_part)
             continue
-        if icuLocaleIdQuery in _timezoneIdParts_db[timezoneId_part].names:
-            name = _timezoneIdParts_db[timezoneId_part].names[icuLocaleIdQuery]
+        name = names.get(icuLocaleIdQuery)
+        if name is not None:
             if name:
                 part_names.append(name)
         elif icuLocaleIdQuery == 'en':
@@ -1198,15 +1552,18 @@ def _timezone_name(timezoneId = None, icuLocaleIdQuery = None):
     '''
     if not (timezoneId and icuLocaleIdQuery):
         return ''
-    if timezoneId in _timezones_db:
-        if icuLocaleIdQuery in _timezones_db[timezoneId].names:
-            return _timezones_db[timezoneId].names[icuLocaleIdQuery]
+    names = _timezones_db.get(timezoneId)
+    if names is not None:
+        name = names.get(icuLocaleIdQuery)
+        if name is not None:
+            return name
     name_from_parts = _timezone_name_from_id_parts(
         timezoneId=timezoneId, icuLocaleIdQuery=icuLocaleIdQuery)
     if name_from_parts:
         return name_from_parts
     return ''
 
+@_lru_cache(maxsize=4096)
 def timezone_name(timezoneId = None, languageIdQuery = None, scriptIdQuery = None, territoryIdQuery = None):
     u'''Query translations of timezone IDs
 
@@ -1231,32 +1588,14 @@ def timezone_name(timezoneId = None, languageIdQuery = None, scriptIdQuery = Non
     >>> print(timezone_name(timezoneId='Pacific/Pago_Pago', languageIdQuery='xxx'))
     Pacific/Pago_Pago
     '''
+    _load('timezones', 'timezoneidparts')
     languageIdQuery, scriptIdQuery, territoryIdQuery = _parse_and_split_languageId(
-        languageId=languageIdQuery,
-        scriptId=scriptIdQuery,
-        territoryId=territoryIdQuery)
-    if languageIdQuery and scriptIdQuery and territoryIdQuery:
-        name = _timezone_name(
-            timezoneId=timezoneId,
-            icuLocaleIdQuery=languageIdQuery+'_'+scriptIdQuery+'_'+territoryIdQuery)
-        if name:
-            return name
-    if languageIdQuery and scriptIdQuery:
+        languageIdQuery, scriptIdQuery, territoryIdQuery)
+    for icuLocaleIdQuery in _icu_locale_ids(
+            languageIdQuery, scriptIdQuery, territoryIdQuery):
         name = _timezone_name(
             timezoneId=timezoneId,
-            icuLocaleIdQuery=languageIdQuery+'_'+scriptIdQuery)
-        if name:
-            return name
-    if languageIdQuery and territoryIdQuery:
-        name = _timezone_name(
-            timezoneId=timezoneId,
-            icuLocaleIdQuery=languageIdQuery+'_'+territoryIdQuery)
-        if name:
-            return name
-    if languageIdQuery:
-        name = _timezone_name(
-            timezoneId=timezoneId,
-            icuLocaleIdQuery=languageIdQuery)
+            icuLocaleIdQuery=icuLocaleIdQuery)
         if name:
             return name
     return timezoneId
@@ -1294,12 +1633,12 @@ def territoryId(territoryName = u''):
     '''
     if not territoryName:
         return ''
+    _load('territories')
     if type(territoryName) != type(u''):
         territoryName = territoryName.decode('UTF-8')
-    for territoryId in _territories_db:
-        for icuLocaleId in _territories_db[territoryId].names:
-            if territoryName == _territories_db[territoryId].names[icuLocaleId]:
-                return territoryId
+    for territoryId, territory in _territories_db.items():
+        if territoryName in territory.names.values():
+            return territoryId
     return ''
 
 def languageId(languageName = u''):
@@ -1329,31 +1668,111 @@ def languageId(languageName = u''):
     '''
     if not languageName:
         return ''
+    _load('languages', 'territories')
     if type(languageName) != type(u''):
         languageName = languageName.decode('UTF-8')
-    for languageId in _languages_db:
-        for icuLocaleId in _languages_db[languageId].names:
-            if languageName.lower() == _languages_db[languageId].names[icuLocaleId].lower():
+    languageName_lower = languageName.lower()
+    for languageId, language in _languages_db.items():
+        for name in language.names.values():
+            if languageName_lower == name.lower():
                 return languageId
-    language_territory_pattern = re.compile(
-        r'^(?P<language_name>[^()]+)[\s]+[(](?P<territory_name>[^()]+)[)]',
-        re.MULTILINE|re.UNICODE)
-    match = language_territory_pattern.search(languageName)
+    match = _language_territory_pattern.search(languageName)
     if match:
-        language_name = match.group('language_name')
-        territory_name = match.group('territory_name')
-        for languageId in _languages_db:
-            for icuLocaleId in _languages_db[languageId].names:
-                if language_name.lower() == _languages_db[languageId].names[icuLocaleId].lower():
-                    for territoryId in _territories_db:
-                        for icuLocaleId_territory in _territories_db[territoryId].names:
-                            if territory_name.lower() == _territories_db[territoryId].names[icuLocaleId_territory].lower():
+        language_name = match.group('language_name').lower()
+        territory_name = match.group('territory_name').lower()
+        for languageId, language in _languages_db.items():
+            for name in language.names.values():
+                if language_name == name.lower():
+                    for territoryId, territory in _territories_db.items():
+                        for territory_name_translated in territory.names.values():
+                            if territory_name == territory_name_translated.lower():
                                 return languageId+'_'+territoryId
 
     return ''
 
 extra_bonus = 1000000
 
+@_lru_cache(maxsize=1024)
+def _languages_db_id(languageId, scriptId, territoryId):
+    '''
+    Only for internal use. Returns the most specific id of an entry in
+    _languages_db which can be built from languageId, scriptId, and
+    territoryId, and whether that entry is specific to the territory
+    already, in that case the territory should not be ranked again.
+    '''
+    if languageId and scriptId and territoryId:
+        icuLocaleId = languageId+'_'+scriptId+'_'+territoryId
+        if icuLocaleId in _languages_db:
+            return icuLocaleId, True
+    if languageId and scriptId:
+        icuLocaleId = languageId+'_'+scriptId
+        if icuLocaleId in _languages_db:
+            return icuLocaleId, False
+    if languageId and territoryId:
+        icuLocaleId = languageId+'_'+territoryId
+        if icuLocaleId in _languages_db:
+            return icuLocaleId, True
+    return languageId, False
+
+def _merge_ranks(language_ranks, language_bonus, territory_ranks, territory_bonus):
+    '''
+    Only for internal use. Returns the dictionary of ranks merged from
+    the ranks of the items of a language and of a territory. Items with
+    rank 0 are left out, items ranked by both get an extra bonus.
+    '''
+    ranked_items = dict([(item, rank * language_bonus)
+                         for item, rank in language_ranks.items()
+                         if rank != 0])
+    ranked_items_get = ranked_items.get
+    for item, rank in territory_ranks.items():
+        if rank != 0:
+            previous_rank = ranked_items_get(item)
+            if previous_rank is None:
+                ranked_items[item] = rank * territory_bonus
+            else:
+                ranked_items[item] = (
+                    previous_rank * rank * extra_bonus * territory_bonus)
+    return ranked_items
+
+def _ranked_items(attribute, languageId, scriptId, territoryId,
+                  language_bonus, territory_bonus, always_rank_territory,
+                  script_skips_territory=False):
+    '''
+    Only for internal use. Ranks the items in the dictionaries with the
+    name attribute (like 'locales' or 'keyboards') of the language and
+    the territory and returns the rankings like _rankings().
+
+    If the language found is specific to the territory already, the
+    items of the territory are only ranked as well if
+    always_rank_territory is True. If script_skips_territory is True,
+    a language specific to the script is treated like that as well.
+    '''
+    _load('languages', 'territories')
+    languageId, scriptId, territoryId = _parse_and_split_languageId(
+        languageId, scriptId, territoryId)
+    languagesDbId, skipTerritory = _languages_db_id(
+        languageId, scriptId, territoryId)
+    if script_skips_territory and languagesDbId != languageId:
+        skipTerritory = True
+    language_ranks = {}
+    if languagesDbId in _languages_db:
+        language_ranks = getattr(_languages_db[languagesDbId], attribute)
+    territory_ranks = {}
+    if territoryId in _territories_db and (always_rank_territory or not skipTerritory):
+        territory_ranks = getattr(_territories_db[territoryId], attribute)
+    return _rankings(_merge_ranks(
+        language_ranks, language_bonus, territory_ranks, territory_bonus))
+
+@_lru_cache(maxsize=1024)
+def _ranked_locales(languageId, scriptId, territoryId):
+    '''
+    Only for internal use. Returns the rankings of the locales
+    for list_locales().
+    '''
+    return _ranked_items(
+        'locales', languageId, scriptId, territoryId,
+        language_bonus=100, territory_bonus=1, always_rank_territory=False)
+
 def list_locales(concise=True, show_weights=False, languageId = None, scriptId = None, territoryId = None):
     '''List suitable glibc locales
 
@@ -1393,47 +1812,19 @@ def list_locales(concise=True, show_weights=False, languageId = None, scriptId =
     ['de_CH.UTF-8']
 
     '''
-    ranked_locales = {}
-    skipTerritory = False
-    languageId, scriptId, territoryId = _parse_and_split_languageId(
-        languageId=languageId,
-        scriptId=scriptId,
-        territoryId=territoryId)
-    if languageId and scriptId and territoryId and languageId+'_'+scriptId+'_'+territoryId in _languages_db:
-        languageId = languageId+'_'+scriptId+'_'+territoryId
-        skipTerritory = True
-    elif languageId and scriptId and languageId+'_'+scriptId in _languages_db:
-        languageId = languageId+'_'+scriptId
-    elif languageId and territoryId and languageId+'_'+territoryId in _languages_db:
-        languageId = languageId+'_'+territoryId
-        skipTerritory = True
-    language_bonus = 100
-    if languageId in _languages_db:
-        for locale in _languages_db[languageId].locales:
-            if _languages_db[languageId].locales[locale] != 0:
-                if locale not in ranked_locales:
-                    ranked_locales[locale] = _languages_db[languageId].locales[locale]
-                else:
-                    ranked_locales[locale] *= _languages_db[languageId].locales[locale]
-                    ranked_locales[locale] *= extra_bonus
-                ranked_locales[locale] *= language_bonus
-    territory_bonus = 1
-    if territoryId in _territories_db and not skipTerritory:
-        for locale in _territories_db[territoryId].locales:
-            if _territories_db[territoryId].locales[locale] != 0:
-                if locale not in ranked_locales:
-                    ranked_locales[locale] = _territories_db[territoryId].locales[locale]
-                else:
-                    ranked_locales[locale] *= _territories_db[territoryId].locales[locale]
-                    ranked_locales[locale] *= extra_bonus
-                ranked_locales[locale] *= territory_bonus
-    ranked_list = _dictionary_to_ranked_list(ranked_locales)
-    if concise:
-        ranked_list = _make_ranked_list_concise(ranked_list)
-    if show_weights:
-        return ranked_list
-    else:
-        return _ranked_list_to_list(ranked_list)
+    return _ranked_tuple_to_result(
+        _ranked_locales(languageId, scriptId, territoryId),
+        concise, show_weights)
+
+@_lru_cache(maxsize=1024)
+def _ranked_scripts(languageId, territoryId):
+    '''
+    Only for internal use. Returns the rankings of the scripts
+    for list_scripts().
+    '''
+    return _ranked_items(
+        'scripts', languageId, None, territoryId,
+        language_bonus=100, territory_bonus=1, always_rank_territory=False)
 
 def list_scripts(concise=True, show_weights=False, languageId = None, scriptId = None, territoryId = None):
     '''List scripts used for a language and/or in a territory
@@ -1491,45 +1882,25 @@ def list_scripts(concise=True, show_weights=False, languageId = None, scriptId =
     and the preferred script for Punjabi in India is “Guru”.
 
     '''
-    ranked_scripts = {}
-    skipTerritory = False
     languageId, scriptId, territoryId = _parse_and_split_languageId(
-        languageId=languageId,
-        scriptId=scriptId,
-        territoryId=territoryId)
+        languageId, scriptId, territoryId)
     if scriptId:
         # scriptId is already given in the input, just return it:
         return [scriptId]
-    if languageId and territoryId and languageId+'_'+territoryId in _languages_db:
-        languageId = languageId+'_'+territoryId
-        skipTerritory = True
-    language_bonus = 100
-    if languageId in _languages_db:
-        for script in _languages_db[languageId].scripts:
-            if _languages_db[languageId].scripts[script] != 0:
-                if script not in ranked_scripts:
-                    ranked_scripts[script] = _languages_db[languageId].scripts[script]
-                else:
-                    ranked_scripts[script] *= _languages_db[languageId].scripts[script]
-                    ranked_scripts[script] *= extra_bonus
-                ranked_scripts[script] *= language_bonus
-    territory_bonus = 1
-    if territoryId in _territories_db and not skipTerritory:
-        for script in _territories_db[territoryId].scripts:
-            if _territories_db[territoryId].scripts[script] != 0:
-                if script not in ranked_scripts:
-                    ranked_scripts[script] = _territories_db[territoryId].scripts[script]
-                else:
-                    ranked_scripts[script] *= _territories_db[territoryId].scripts[script]
-                    ranked_scripts[script] *= extra_bonus
-                ranked_scripts[script] *= territory_bonus
-    ranked_list = _dictionary_to_ranked_list(ranked_scripts)
-    if concise:
-        ranked_list = _make_ranked_list_concise(ranked_list)
-    if show_weights:
-        return ranked_list
-    else:
-        return _ranked_list_to_list(ranked_list)
+    return _ranked_tuple_to_result(
+        _ranked_scripts(languageId, territoryId),
+        concise, show_weights)
+
+@_lru_cache(maxsize=1024)
+def _ranked_inputmethods(languageId, scriptId, territoryId):
+    '''
+    Only for internal use. Returns the rankings of the input methods
+    for list_inputmethods().
+    '''
+    return _ranked_items(
+        'inputmethods', languageId, scriptId, territoryId,
+        language_bonus=100, territory_bonus=1, always_rank_territory=False,
+        script_skips_territory=True)
 
 def list_inputmethods(concise=True, show_weights=False, languageId = None, scriptId = None, territoryId = None):
     '''List suitable input methods
@@ -1562,48 +1933,19 @@ def list_inputmethods(concise=True, show_weights=False, languageId = None, scrip
     >>> list_inputmethods(territoryId="JP")
     ['ibus/kkc', 'ibus/anthy']
     '''
-    ranked_inputmethods = {}
-    skipTerritory = False
-    languageId, scriptId, territoryId = _parse_and_split_languageId(
-        languageId=languageId,
-        scriptId=scriptId,
-        territoryId=territoryId)
-    if languageId and scriptId and territoryId and languageId+'_'+scriptId+'_'+territoryId in _languages_db:
-        languageId = languageId+'_'+scriptId+'_'+territoryId
-        skipTerritory = True
-    elif languageId and scriptId and languageId+'_'+scriptId in _languages_db:
-        languageId = languageId+'_'+scriptId
-        skipTerritory = True
-    elif languageId and territoryId and languageId+'_'+territoryId in _languages_db:
-        languageId = languageId+'_'+territoryId
-        skipTerritory = True
-    language_bonus = 100
-    if languageId in _languages_db:
-        for inputmethod in _languages_db[languageId].inputmethods:
-            if _languages_db[languageId].inputmethods[inputmethod] != 0:
-                if inputmethod not in ranked_inputmethods:
-                    ranked_inputmethods[inputmethod] = _languages_db[languageId].inputmethods[inputmethod]
-                else:
-                    ranked_inputmethods[inputmethod] *= _languages_db[languageId].inputmethods[inputmethod]
-                    ranked_inputmethods[inputmethod] *= extra_bonus
-                ranked_inputmethods[inputmethod] *= language_bonus
-    territory_bonus = 1
-    if territoryId in _territories_db and not skipTerritory:
-        for inputmethod in _territories_db[territoryId].inputmethods:
-            if _territories_db[territoryId].inputmethods[inputmethod] != 0:
-                if inputmethod not in ranked_inputmethods:
-                    ranked_inputmethods[inputmethod] = _territories_db[territoryId].inputmethods[inputmethod]
-                else:
-                    ranked_inputmethods[inputmethod] *= _territories_db[territoryId].inputmethods[inputmethod]
-                    ranked_inputmethods[inputmethod] *= extra_bonus
-                ranked_inputmethods[inputmethod] *= territory_bonus
-    ranked_list = _dictionary_to_ranked_list(ranked_inputmethods)
-    if concise:
-        ranked_list = _make_ranked_list_concise(ranked_list)
-    if show_weights:
-        return ranked_list
-    else:
-        return _ranked_list_to_list(ranked_list)
+    return _ranked_tuple_to_result(
+        _ranked_inputmethods(languageId, scriptId, territoryId),
+        concise, show_weights)
+
+@_lru_cache(maxsize=1024)
+def _ranked_keyboards(languageId, scriptId, territoryId):
+    '''
+    Only for internal use. Returns the rankings of the keyboard layouts
+    for list_keyboards().
+    '''
+    return _ranked_items(
+        'keyboards', languageId, scriptId, territoryId,
+        language_bonus=1, territory_bonus=1, always_rank_territory=True)
 
 def list_keyboards(concise=True, show_weights=False, languageId = None, scriptId = None, territoryId = None):
     '''List likely X11 keyboard layouts
@@ -1638,47 +1980,19 @@ def list_keyboards(concise=True, show_weights=False, languageId = None, scriptId
     >>> list_keyboards(languageId="de", territoryId="CH")
     ['ch']
     '''
-    ranked_keyboards = {}
-    skipTerritory = False
-    languageId, scriptId, territoryId = _parse_and_split_languageId(
-        languageId=languageId,
-        scriptId=scriptId,
-        territoryId=territoryId)
-    if languageId and scriptId and territoryId and languageId+'_'+scriptId+'_'+territoryId in _languages_db:
-        languageId = languageId+'_'+scriptId+'_'+territoryId
-        skipTerritory = True
-    elif languageId and scriptId and languageId+'_'+scriptId in _languages_db:
-        languageId = languageId+'_'+scriptId
-    elif languageId and territoryId and languageId+'_'+territoryId in _languages_db:
-        languageId = languageId+'_'+territoryId
-        skipTerritory = True
-    language_bonus = 1
-    if languageId in _languages_db:
-        for keyboard in _languages_db[languageId].keyboards:
-            if _languages_db[languageId].keyboards[keyboard] != 0:
-                if keyboard not in ranked_keyboards:
-                    ranked_keyboards[keyboard] = _languages_db[languageId].keyboards[keyboard]
-                else:
-                    ranked_keyboards[keyboard] *= _languages_db[languageId].keyboards[keyboard]
-                    ranked_keyboards[keyboard] *= extra_bonus
-                ranked_keyboards[keyboard] *= language_bonus
-    territory_bonus = 1
-    if territoryId in _territories_db:
-        for keyboard in _territories_db[territoryId].keyboards:
-            if _territories_db[territoryId].keyboards[keyboard] != 0:
-                if keyboard not in ranked_keyboards:
-                    ranked_keyboards[keyboard] = _territories_db[territoryId].keyboards[keyboard]
-                else:
-                    ranked_keyboards[keyboard] *= _territories_db[territoryId].keyboards[keyboard]
-                    ranked_keyboards[keyboard] *= extra_bonus
-                ranked_keyboards[keyboard] *= territory_bonus
-    ranked_list = _dictionary_to_ranked_list(ranked_keyboards)
-    if concise:
-        ranked_list = _make_ranked_list_concise(ranked_list)
-    if show_weights:
-        return ranked_list
-    else:
-        return _ranked_list_to_list(ranked_list)
+    return _ranked_tuple_to_result(
+        _ranked_keyboards(languageId, scriptId, territoryId),
+        concise, show_weights)
+
+@_lru_cache(maxsize=1024)
+def _ranked_consolefonts(languageId, scriptId, territoryId):
+    '''
+    Only for internal use. Returns the rankings of the console fonts
+    for list_consolefonts().
+    '''
+    return _ranked_items(
+        'consolefonts', languageId, scriptId, territoryId,
+        language_bonus=100, territory_bonus=1, always_rank_territory=True)
 
 def list_consolefonts(concise=True, show_weights=False, languageId = None, scriptId = None, territoryId = None):
     u'''List likely Linux Console fonts
@@ -1735,47 +2049,19 @@ def list_consolefonts(concise=True, show_weights=False, languageId = None, scrip
     ['latarcyrheb-sun16', 'eurlatgr']
 
     '''
-    ranked_consolefonts = {}
-    skipTerritory = False
-    languageId, scriptId, territoryId = _parse_and_split_languageId(
-        languageId=languageId,
-        scriptId=scriptId,
-        territoryId=territoryId)
-    if languageId and scriptId and territoryId and languageId+'_'+scriptId+'_'+territoryId in _languages_db:
-        languageId = languageId+'_'+scriptId+'_'+territoryId
-        skipTerritory = True
-    elif languageId and scriptId and languageId+'_'+scriptId in _languages_db:
-        languageId = languageId+'_'+scriptId
-    elif languageId and territoryId and languageId+'_'+territoryId in _languages_db:
-        languageId = languageId+'_'+territoryId
-        skipTerritory = True
-    language_bonus = 100
-    if languageId in _languages_db:
-        for consolefont in _languages_db[languageId].consolefonts:
-            if _languages_db[languageId].consolefonts[consolefont] != 0:
-                if consolefont not in ranked_consolefonts:
-                    ranked_consolefonts[consolefont] = _languages_db[languageId].consolefonts[consolefont]
-                else:
-                    ranked_consolefonts[consolefont] *= _languages_db[languageId].consolefonts[consolefont]
-                    ranked_consolefonts[consolefont] *= extra_bonus
-                ranked_consolefonts[consolefont] *= language_bonus
-    territory_bonus = 1
-    if territoryId in _territories_db:
-        for consolefont in _territories_db[territoryId].consolefonts:
-            if _territories_db[territoryId].consolefonts[consolefont] != 0:
-                if consolefont not in ranked_consolefonts:
-                    ranked_consolefonts[consolefont] = _territories_db[territoryId].consolefonts[consolefont]
-                else:
-                    ranked_consolefonts[consolefont] *= _territories_db[territoryId].consolefonts[consolefont]
-                    ranked_consolefonts[consolefont] *= extra_bonus
-                ranked_consolefonts[consolefont] *= territory_bonus
-    ranked_list = _dictionary_to_ranked_list(ranked_consolefonts)
-    if concise:
-        ranked_list = _make_ranked_list_concise(ranked_list)
-    if show_weights:
-        return ranked_list
-    else:
-        return _ranked_list_to_list(ranked_list)
+    return _ranked_tuple_to_result(
+        _ranked_consolefonts(languageId, scriptId, territoryId),
+        concise, show_weights)
+
+@_lru_cache(maxsize=1024)
+def _ranked_timezones(languageId, scriptId, territoryId):
+    '''
+    Only for internal use. Returns the rankings of the timezones
+    for list_timezones().
+    '''
+    return _ranked_items(
+        'timezones', languageId, scriptId, territoryId,
+        language_bonus=1, territory_bonus=100, always_rank_territory=True)
 
 def list_timezones(concise=True, show_weights=False, languageId = None, scriptId = None, territoryId = None):
     '''List likely timezones
@@ -1814,48 +2100,11 @@ def list_timezones(concise=True, show_weights=False, languageId = None, scriptId
     >>> list_timezones(languageId="ja", territoryId="CH")
     ['Europe/Zurich', 'Asia/Tokyo']
     '''
-    ranked_timezones = {}
-    skipTerritory = False
-    languageId, scriptId, territoryId = _parse_and_split_languageId(
-        languageId=languageId,
-        scriptId=scriptId,
-        territoryId=territoryId)
-    if languageId and scriptId and territoryId and languageId+'_'+scriptId+'_'+territoryId in _languages_db:
-        languageId = languageId+'_'+scriptId+'_'+territoryId
-        skipTerritory = True
-    elif languageId and scriptId and languageId+'_'+scriptId in _languages_db:
-        languageId = languageId+'_'+scriptId
-    elif languageId and territoryId and languageId+'_'+territoryId in _languages_db:
-        languageId = languageId+'_'+territoryId
-        skipTerritory = True
-    language_bonus = 1
-    if languageId in _languages_db:
-        for timezone in _languages_db[languageId].timezones:
-            if _languages_db[languageId].timezones[timezone] != 0:
-                if timezone not in ranked_timezones:
-                    ranked_timezones[timezone] = _languages_db[languageId].timezones[timezone]
-                else:
-                    ranked_timezones[timezone] *= _languages_db[languageId].timezones[timezone]
-                    ranked_timezones[timezone] *= extra_bonus
-                ranked_timezones[timezone] *= language_bonus
-    territory_bonus = 100
-    if territoryId in _territories_db:
-        for timezone in _territories_db[territoryId].timezones:
-            if _territories_db[territoryId].timezones[timezone] != 0:
-                if timezone not in ranked_timezones:
-                    ranked_timezones[timezone] = _territories_db[territoryId].timezones[timezone]
-                else:
-                    ranked_timezones[timezone] *= _territories_db[territoryId].timezones[timezone]
-                    ranked_timezones[timezone] *= extra_bonus
-                ranked_timezones[timezone] *= territory_bonus
-    ranked_list = _dictionary_to_ranked_list(ranked_timezones)
-    if concise:
-        ranked_list = _make_ranked_list_concise(ranked_list)
-    if show_weights:
-        return ranked_list
-    else:
-        return _ranked_list_to_list(ranked_list)
+    return _ranked_tuple_to_result(
+        _ranked_timezones(languageId, scriptId, territoryId),
+        concise, show_weights)
 
+@_lru_cache(maxsize=2048)
 def supports_ascii(keyboardId=None):
     '''Check whether a keyboard layout supports ASCII
 
@@ -1875,6 +2124,7 @@ def supports_ascii(keyboardId=None):
     >>> supports_ascii("ru")
     False
     '''
+    _load('keyboards')
     if keyboardId in _keyboards_db:
         return _keyboards_db[keyboardId].ascii
     return True
@@ -1913,6 +2163,70 @@ def _test_language_territory(show_weights=False, languageId=None, scriptId=None,
           )
     return
 
+def _clear_caches():
+    '''
+    Only for internal use. Clears the caches of the memoized functions,
+    this has to be done whenever the databases change.
+    '''
+    for function in (_parse_and_split_languageId,
+                     _icu_locale_ids,
+                     _languages_db_id,
+                     territory_name,
+                     language_name,
+                     timezone_name,
+                     supports_ascii,
+                     _ranked_locales,
+                     _ranked_keyboards,
+                     _ranked_consolefonts,
+                     _ranked_scripts,
+                     _ranked_inputmethods,
+                     _ranked_timezones):
+        function.cache_clear()
+
+# The databases are read from these files when they are first needed:
+_data_files = {
+    'territories': ('territories.xml', TerritoriesContentHandler,
+                    _territories_db, territory_db_item),
+    'languages': ('languages.xml', LanguagesContentHandler,
+                  _languages_db, language_db_item),
+    'keyboards': ('keyboards.xml', KeyboardsContentHandler,
+                  _keyboards_db, keyboard_db_item),
+    'timezones': ('timezones.xml', TimezonesContentHandler,
+                  _timezones_db, None),
+    'timezoneidparts': ('timezoneidparts.xml', TimezoneIdPartsContentHandler,
+                        _timezoneIdParts_db, None),
+}
+
+_loaded_data_files = set()
+_load_lock = threading.Lock()
+
+def _read_data_file(datadir, name, use_cache=True):
+    '''
+    Only for internal use. Reads the data file with the given name
+    (a key of _data_files) into its database.
+    '''
+    filename, content_handler, db, db_item = _data_files[name]
+    _read_file(datadir, filename, content_handler(db), db, db_item,
+               use_cache=use_cache)
+    _loaded_data_files.add(name)
+
+def _load(*names):
+    '''
+    Only for internal use. Reads the data files with the given names
+    (keys of _data_files) unless they have been read already.
+
+    Nothing is read when importing the module, every function reads
+    only the databases it uses when it is called the first time. The
+    memoized functions call this inside, so for results found in their
+    caches not even this check is needed.
+    '''
+    for name in names:
+        if name not in _loaded_data_files:
+            with _load_lock:
+                # another thread may have read it in the meantime
+                if name not in _loaded_data_files:
+                    _read_data_file(_datadir, name)
+
 def _init(debug = False,
          logfilename = '/dev/null',
          datadir = _datadir):
@@ -1925,21 +2239,11 @@ def _init(debug = False,
                         format="%(levelname)s: %(message)s",
                         level=log_level)
 
-    _read_file(datadir, 'territories.xml', TerritoriesContentHandler())
-    _read_file(datadir, 'languages.xml', LanguagesContentHandler())
-    _read_file(datadir, 'keyboards.xml', KeyboardsContentHandler())
-    _read_file(datadir, 'timezones.xml', TimezonesContentHandler())
-    _read_file(datadir, 'timezoneidparts.xml', TimezoneIdPartsContentHandler())
-
-class __ModuleInitializer:
-    def __init__(self):
-        _init()
-        return
-
-    def __del__(self):
-        return
-
-__module_init = __ModuleInitializer()
+    with _load_lock:
+        for name in ('territories', 'languages', 'keyboards',
+                     'timezones', 'timezoneidparts'):
+            _read_data_file(datadir, name)
+    _clear_caches()
 
 if __name__ == "__main__":
     import doctest
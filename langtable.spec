@@ -95,6 +95,13 @@ popd
 # it does not hurt to gzip them again:
 gzip --force --best $RPM_BUILD_ROOT/%{_datadir}/langtable/*.xml
 %endif # with_python3
+# pickle caches of the data, langtable reads them much faster than the
+# XML files. They have to be written after the last gzip because older
+# caches are ignored:
+%{__python} -c "import sys; sys.path.insert(0, '$RPM_BUILD_ROOT%{python_sitelib}'); import langtable; langtable._write_cache_files('$RPM_BUILD_ROOT%{_datadir}/langtable')"
+%if 0%{?with_python3}
+%{__python3} -c "import sys; sys.path.insert(0, '$RPM_BUILD_ROOT%{python3_sitelib}'); import langtable; langtable._write_cache_files('$RPM_BUILD_ROOT%{_datadir}/langtable')"
+%endif # with_python3
 
 %check
 (cd $RPM_BUILD_DIR/%{name}-%{version}/data; PYTHONPATH=.. %{__python} ../test_cases.py; %{__python} ../langtable.py)
@@ -123,6 +130,7 @@ xmllint --noout --relaxng $RPM_BUILD_ROOT/%{_datadir}/langtable/schemas/timezone
 %files data
 %dir %{_datadir}/langtable/
 %{_datadir}/langtable/*.xml.gz
+%{_datadir}/langtable/*.pickle.gz
 
 %changelog
 * Wed Jul 01 2015 Mike FABIAN <mfabian@redhat.com> - 0.0.34-1
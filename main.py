@@ -194,15 +194,15 @@ def get_translations_from_cldr(main_cldr_dir = None):
                         'territory_to_translate': territory_to_translate})
         for timezone_city_to_translate in translations_timezone_cities:
             if timezone_city_to_translate in langtable._timezoneIdParts_db:
-                if target_language not in langtable._timezoneIdParts_db[timezone_city_to_translate].names:
+                if target_language not in langtable._timezoneIdParts_db[timezone_city_to_translate]:
                     if timezone_city_to_translate not in ['Vevay', 'Center']:
                         print("Missing: %(timezone_city_to_translate)s → %(target_language)s = %(tr)s" %{
                             'timezone_city_to_translate': timezone_city_to_translate,
                             'target_language': target_language,
                             'tr': translations_timezone_cities[timezone_city_to_translate]})
-                        langtable._timezoneIdParts_db[timezone_city_to_translate].names[target_language] = translations_timezone_cities[timezone_city_to_translate]
+                        langtable._timezoneIdParts_db[timezone_city_to_translate][target_language] = translations_timezone_cities[timezone_city_to_translate]
                 elif translations_timezone_cities[timezone_city_to_translate] \
-                     == langtable._timezoneIdParts_db[timezone_city_to_translate].names[target_language]:
+                     == langtable._timezoneIdParts_db[timezone_city_to_translate][target_language]:
                     if opts['debug']:
                         print("Identical: %(timezone_city_to_translate)s → %(target_language)s = %(tr)s" %{
                             'timezone_city_to_translate': timezone_city_to_translate,
@@ -213,7 +213,7 @@ def get_translations_from_cldr(main_cldr_dir = None):
                         print("- %(timezone_city_to_translate)s → %(target_language)s = %(tr)s" %{
                             'timezone_city_to_translate': timezone_city_to_translate,
                             'target_language': target_language,
-                            'tr': langtable._timezoneIdParts_db[timezone_city_to_translate].names[target_language]})
+                            'tr': langtable._timezoneIdParts_db[timezone_city_to_translate][target_language]})
                         print("+ %(timezone_city_to_translate)s → %(target_language)s = %(tr)s" %{
                             'timezone_city_to_translate': timezone_city_to_translate,
                             'target_language': target_language,
@@ -241,6 +241,8 @@ def main():
                     datadir = './data')
 
     get_translations_from_cldr(main_cldr_dir='/local/mfabian/src/cldr-svn/trunk/common/main')
+    # the translations changed, results of earlier queries are stale:
+    langtable._clear_caches()
 
     #_test_timezone_names()
 
@@ -1336,6 +1336,160 @@ def dummy():
         Océanu Pacíficu/Pago Pago
     '''
 
+def cache_files():
+    u'''
+    >>> import os
+    >>> import shutil
+    >>> import tempfile
+    >>> import langtable
+    >>> try:
+    ...     import cPickle as pickle
+    ... except ImportError:
+    ...     import pickle
+    >>> langtable._load('territories', 'timezones')
+    >>> datadir = tempfile.mkdtemp()
+    >>> xml_path = os.path.join(datadir, 'timezones.xml')
+    >>> _ = shutil.copy('timezones.xml', xml_path)
+    >>> cache_path = langtable._cache_path(xml_path)
+
+    # A cache file contains the same items as the database written to it:
+    >>> territories_cache_path = langtable._cache_path(os.path.join(datadir, 'territories.xml.gz'))
+    >>> langtable._write_cache(territories_cache_path, langtable._territories_db)
+    >>> db = {}
+    >>> langtable._read_cache(territories_cache_path, db, langtable.territory_db_item)
+    >>> sorted(db) == sorted(langtable._territories_db)
+    True
+    >>> all([getattr(db[territoryId], slot) == getattr(langtable._territories_db[territoryId], slot) for territoryId in db for slot in langtable.territory_db_item.__slots__])
+    True
+    >>> langtable._write_cache(cache_path, langtable._timezones_db)
+    >>> db = {}
+    >>> langtable._read_cache(cache_path, db, None)
+    >>> db == langtable._timezones_db
+    True
+
+    # A cache which is not older than the XML file is used:
+    >>> langtable._write_cache(cache_path, {'Europe/Berlin': {'de': u'cached'}})
+    >>> os.utime(xml_path, (0, 0))
+    >>> db = {}
+    >>> langtable._read_file(datadir, 'timezones.xml', langtable.TimezonesContentHandler(db), db, None)
+    >>> print(db['Europe/Berlin']['de'])
+    cached
+
+    # A cache older than the XML file is ignored and the XML file is parsed:
+    >>> os.utime(cache_path, (0, 0))
+    >>> os.utime(xml_path, None)
+    >>> db = {}
+    >>> langtable._read_file(datadir, 'timezones.xml', langtable.TimezonesContentHandler(db), db, None)
+    >>> sorted(db), db == langtable._timezones_db
+    (['US/Pacific'], True)
+
+    # A cache with a different format version or items of an old layout
+    # is rejected, and the XML file is parsed instead:
+    >>> def write_pickle(path, data):
+    ...     with langtable._open_for_writing(path) as file:
+    ...         pickle.dump(data, file, pickle.HIGHEST_PROTOCOL)
+    >>> write_pickle(cache_path, {'format': langtable._cache_format - 1, 'items': {'Europe/Berlin': {'de': u'cached'}}})
+    >>> langtable._read_cache(cache_path, {}, None) # doctest: +ELLIPSIS
+    Traceback (most recent call last):
+    ...
+    ValueError: cache does not have format version ...
+    >>> write_pickle(cache_path, {'format': langtable._cache_format, 'items': {'Europe/Berlin': {'names': {'de': u'cached'}}}})
+    >>> langtable._read_cache(cache_path, {}, None)
+    Traceback (most recent call last):
+    ...
+    ValueError: cache item Europe/Berlin is not a dictionary of names
+    >>> write_pickle(territories_cache_path, {'format': langtable._cache_format, 'items': {'CH': {'names': {}}}})
+    >>> langtable._read_cache(territories_cache_path, {}, langtable.territory_db_item)
+    Traceback (most recent call last):
+    ...
+    ValueError: cache item CH is not a territory_db_item
+    >>> db = {}
+    >>> langtable._read_file(datadir, 'timezones.xml', langtable.TimezonesContentHandler(db), db, None)
+    >>> sorted(db), db == langtable._timezones_db
+    (['US/Pacific'], True)
+
+    # Caches are never read from the current directory, only from the
+    # data directory:
+    >>> langtable._write_cache(cache_path, {'Europe/Berlin': {'de': u'cached'}})
+    >>> cwd = os.getcwd()
+    >>> db = {}
+    >>> try:
+    ...     os.chdir(datadir)
+    ...     langtable._read_file(os.path.join(datadir, 'nonexistent'), 'timezones.xml', langtable.TimezonesContentHandler(db), db, None)
+    ... finally:
+    ...     os.chdir(cwd)
+    >>> sorted(db), db == langtable._timezones_db
+    (['US/Pacific'], True)
+
+    # _write_cache_files() parses the XML files even if there are caches
+    # which look fresh:
+    >>> for name in ['territories', 'languages', 'keyboards', 'timezones', 'timezoneidparts']:
+    ...     _ = shutil.copy(name+'.xml', datadir)
+    >>> timezones_cache_path = langtable._cache_path(os.path.join(datadir, 'timezones.xml.gz'))
+    >>> write_pickle(timezones_cache_path, {'format': langtable._cache_format, 'items': {'Europe/Berlin': {'de': u'cached'}}})
+    >>> langtable._write_cache_files(datadir)
+    >>> db = {}
+    >>> langtable._read_cache(timezones_cache_path, db, None)
+    >>> 'Europe/Berlin' in db, db == langtable._timezones_db
+    (False, True)
+    >>> shutil.rmtree(datadir)
+    '''
+
+def parsers():
+    u'''
+    Reading the XML files gives the same databases with expat and with lxml
+    (when lxml is not available, only expat is compared with itself):
+
+    >>> import io
+    >>> import langtable
+    >>> lxml_etree = langtable._lxml_etree
+    >>> def read_all():
+    ...     dbs = {}
+    ...     for name in sorted(langtable._data_files):
+    ...         filename, content_handler, db, db_item = langtable._data_files[name]
+    ...         db.clear()
+    ...         langtable._read_file('.', filename, content_handler(db), db, db_item, use_cache=False)
+    ...         dbs[name] = dict([
+    ...             (key, value if db_item is None else
+    ...              dict([(field, getattr(value, field)) for field in db_item.__slots__]))
+    ...             for key, value in db.items()])
+    ...     return dbs
+    >>> results = []
+    >>> for etree in [None, lxml_etree]:
+    ...     langtable._lxml_etree = etree
+    ...     results.append(read_all())
+    >>> [len(dbs[name]) > 0 for dbs in results for name in sorted(dbs)]
+    [True, True, True, True, True, True, True, True, True, True]
+    >>> results[0] == results[1]
+    True
+
+    The order of the child elements does not matter to either parser,
+    and children which are missing get the same defaults:
+
+    >>> timezones_xml = (b'<timezones><timezone><timezoneId>Foo/Bar</timezoneId>'
+    ...        b'<names><name><trName>Foo</trName><languageId>de</languageId></name></names>'
+    ...        b'</timezone></timezones>')
+    >>> keyboards_xml = (b'<keyboards><keyboard><territories><territory>'
+    ...        b'<rank>1</rank><territoryId>DE</territoryId>'
+    ...        b'</territory></territories><ascii>True</ascii><keyboardId>foo</keyboardId>'
+    ...        b'</keyboard></keyboards>')
+    >>> for etree in [None, lxml_etree]:
+    ...     langtable._lxml_etree = etree
+    ...     db = {}
+    ...     langtable._parse(io.BytesIO(timezones_xml), langtable.TimezonesContentHandler(db))
+    ...     print(db['Foo/Bar']['de'])
+    ...     db = {}
+    ...     langtable._parse(io.BytesIO(keyboards_xml), langtable.KeyboardsContentHandler(db))
+    ...     print([getattr(db['foo'], field) for field in langtable.keyboard_db_item.__slots__])
+    Foo
+    [None, True, None, {}, {'DE': 1}]
+    Foo
+    [None, True, None, {}, {'DE': 1}]
+    >>> langtable._lxml_etree = lxml_etree
+    >>> _ = read_all()
+    >>> langtable._clear_caches()
+    '''
+
 if __name__ == "__main__":
     import doctest
     doctest.testmod()